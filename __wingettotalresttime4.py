@@ -1,15 +1,34 @@
 #!/usr/bin/env python3
 
+import sys
+# The subcommands that replace the shell scripts ("sumrest" and "quick") need only the standard modules,
+# so they are run before importing numpy and the other heavy modules, see winlog_quick.py
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] in ("sumrest", "quick"):
+    import winlog_quick
+    sys.exit(winlog_quick.main(sys.argv[1:]))
+
 import argparse
+import concurrent.futures
+import contextlib
+import glob
+import hashlib
+import heapq
+import io
+import pickle
 import re
-import sys
+import struct
 import subprocess
 import time
 import os
 from enum import IntEnum
 import copy
 import datetime
+import filecmp
+import itertools
 import math
+import mmap
+import zlib
+import numpy as np
 import texttable as tt
 import yaml
 
@@ -30,6 +49,29 @@ date_re = re.compile(r'^[0-9-_]+')
 rest_re = re.compile(r'^rest +(\d+) +min')
 rest_d_re = re.compile(r'^rest *$')
 rest_q_re = re.compile(r'^rest *[?]+ *$')
+# In the event log mode the logger writes a line only when the window or the activity changes, and a heartbeat line
+# at least every N seconds while the user is active; after each such line it writes "active N",
+# so the time until the next timestamp (if it is not later than N seconds) is work
+active_re = re.compile(r'^active +(\d+) *$')
+# The lines of the lock event files written by daemon_is_screen_locked.py
+# ("Unknown" is written when the daemon starts, the screen lock state is not known then)
+lock_event_re = re.compile(r'^([0-9_-]+)\s+(Locked|Unlocked|Unknown)\s*$')
+
+# Match in the raw bytes of a log file the parts of lines that are used by the parser:
+# the timestamps (group 1, the same as date_re) and the whole lines that begin with "rest" or "active" (group 2).
+# The lines are found by the leading newline, since the search for a literal is much faster than "^" with re.MULTILINE,
+# so the first line of a file is matched separately.
+first_needed_line_part_bytes_re = re.compile(rb'([0-9_-]+)|((?:rest|active)[^\r\n]*)')
+needed_line_part_bytes_re = re.compile(rb'\n(?:([0-9_-]+)|((?:rest|active)[^\r\n]*))')
+# The same with the rest of the timestamp lines (group 2); the window title is the rest of the line
+# without the idle time and the padding, it is found by window_title_tail_bytes_re
+first_titled_line_part_bytes_re = re.compile(rb'([0-9_-]+)([^\r\n]*)|((?:rest|active)[^\r\n]*)')
+titled_line_part_bytes_re = re.compile(rb'\n(?:([0-9_-]+)([^\r\n]*)|((?:rest|active)[^\r\n]*))')
+window_title_tail_bytes_re = re.compile(rb'\s+(.*?)(?:\s+[0-9.]+ sec)?\s*$')
+# The timestamps at the beginning of lines, to find the first and the last timestamps of a file quickly
+line_timestamp_bytes_re = re.compile(rb'(?:^|\n)([0-9_-]+)')
+# The date in the name of a log, e.g. winlog_2021-04-30 or winlog_2021-04-30.remote
+log_name_date_re = re.compile(r'^winlog_([0-9]{4}-[0-9]{2}-[0-9]{2})(?:\.|$)')
 
 def END_OF_DAY_TIME():
     return datetime.time(6)
@@ -40,6 +82,9 @@ def DEFAULT_TIME_STEP_IN_SECONDS():
 def DEFAULT_TIME_STEP_AS_TIMEDELTA():
     return datetime.timedelta(seconds = DEFAULT_TIME_STEP_IN_SECONDS())
 
+def DEFAULT_TIMELINE_CHUNK_LEN():
+    return 3600 // DEFAULT_TIME_STEP_IN_SECONDS() # one hour of time items
+
 def get_index_for_time(cur_time, first_time):
     delta1 = cur_time - first_time
     assert(delta1.days == 0)
@@ -52,6 +97,58 @@ def convert_index_to_another_time_array(cur_index, first_time_from, first_time_t
     time1 = get_time_for_index(cur_index, first_time_from)
     return get_index_for_time(time1, first_time_to)
 
+def SECONDS_IN_DAY():
+    return 24 * 3600
+
+class TimestampDecoder:
+    # Decodes the timestamps of the log lines, i.e. the strings in the format "%Y-%m-%d_%H-%M-%S" matched by date_re.
+    #
+    # The digits are sliced directly from the fixed positions, the date part is cached (all the lines of a log
+    # have one or two dates), and the result is the pair (date ordinal, number of seconds since midnight).
+    # The strings that do not have exactly this format are passed to datetime.strptime, so the errors are the same.
+    TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+    TIMESTAMP_LEN = 19
+
+    def __init__(self):
+        self.cached_date_str = None
+        self.cached_date_ordinal = None
+
+    def decode(self, timestamp_str):
+        if (len(timestamp_str) != TimestampDecoder.TIMESTAMP_LEN
+                or timestamp_str.count("-") != 4 or timestamp_str.count("_") != 1
+                or timestamp_str[4] != "-" or timestamp_str[7] != "-" or timestamp_str[10] != "_"
+                or timestamp_str[13] != "-" or timestamp_str[16] != "-"):
+            return self._decode_slowly(timestamp_str)
+        # since date_re allows only digits, "-" and "_", all the other characters are digits here
+
+        date_str = timestamp_str[:10]
+        if date_str != self.cached_date_str:
+            date_ordinal = datetime.date(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10])).toordinal()
+            self.cached_date_str = date_str
+            self.cached_date_ordinal = date_ordinal
+
+        hours = int(timestamp_str[11:13])
+        minutes = int(timestamp_str[14:16])
+        seconds = int(timestamp_str[17:19])
+        if (hours > 23) or (minutes > 59) or (seconds > 59):
+            return self._decode_slowly(timestamp_str)
+        return (self.cached_date_ordinal, hours * 3600 + minutes * 60 + seconds)
+
+    def decode_to_datetime(self, timestamp_str):
+        return TimestampDecoder.to_datetime(*self.decode(timestamp_str))
+
+    @staticmethod
+    def _decode_slowly(timestamp_str):
+        return TimestampDecoder.from_datetime(datetime.datetime.strptime(timestamp_str, TimestampDecoder.TIMESTAMP_FORMAT))
+
+    @staticmethod
+    def from_datetime(cur_time):
+        return (cur_time.toordinal(), cur_time.hour * 3600 + cur_time.minute * 60 + cur_time.second)
+
+    @staticmethod
+    def to_datetime(date_ordinal, seconds):
+        return datetime.datetime.fromordinal(date_ordinal) + datetime.timedelta(seconds = seconds)
+
 class LogFileHandling:
     @staticmethod
     def DEFAULT_FOLDER_WITH_LOGS():
@@ -78,6 +175,14 @@ class LogFileHandling:
     def current_worklog_path_from_remote(date_suffix = None):
         return LogFileHandling.current_worklog_path(date_suffix) + ".remote"
 
+    @staticmethod
+    def lock_events_path(folder, date_suffix):
+        return os.path.join(folder, "lockevents_" + date_suffix)
+
+    @staticmethod
+    def DEFAULT_CACHE_FOLDER():
+        return os.path.join(LogFileHandling.DEFAULT_FOLDER_WITH_LOGS(), ".wingettotalresttime_cache")
+
 #    @staticmethod
 #    def scp_from_remote(ip_final_part):
 #        assert(int(ip_final_part))
@@ -193,25 +298,185 @@ class SpecialTimeSegment:
         self.num_items_rest = int(num_rest_minutes) * 60 // DEFAULT_TIME_STEP_IN_SECONDS();
         self.num_items_work = self.num_items_total - self.num_items_rest
 
+    def to_packed(self):
+        return dict(vars(self))
+
+    @staticmethod
+    def from_packed(packed):
+        segment = SpecialTimeSegment.__new__(SpecialTimeSegment)
+        vars(segment).update(packed)
+        return segment
+
 #class ReferenceToSpecialTimeSegment:
 #    def __init__(self, index):
 #        self.index = index
 
+class TitleTable:
+    # Dictionary encoding of window titles: each distinct title gets an integer id
+    def __init__(self, titles=None):
+        self.titles = list(titles or [])
+        self.ids_by_titles = {title: title_id for (title_id, title) in enumerate(self.titles)}
+
+    def __len__(self):
+        return len(self.titles)
+
+    def get_id(self, title):
+        title_id = self.ids_by_titles.get(title)
+        if title_id is None:
+            title_id = len(self.titles)
+            self.titles.append(title)
+            self.ids_by_titles[title] = title_id
+        return title_id
+
 class Data:
+    # The timeline is stored as two parallel arrays with one slot per time step:
+    # * states -- the value of State for the slot, or EMPTY_STATE if the slot has no "normal" state
+    #   (i.e. it is either None or belongs to a special time segment)
+    # * segment_ids -- the index of the special time segment in special_time_segments, or NO_SEGMENT
+    # If the titles are enabled, there is also
+    # * title_ids -- the id of the window title (in title_table) of the timestamp in the slot, or NO_TITLE
+    EMPTY_STATE = 0
+    NO_SEGMENT = -1
+    NO_TITLE = -1
+
     def __init__(self, first_time, last_time):
+        required_len = Data.get_required_len(first_time, last_time)
+
+        self.first_time = first_time
+        self.last_time = last_time
+        self.states = np.full(required_len, Data.EMPTY_STATE, dtype=np.uint8)
+        self.segment_ids = np.full(required_len, Data.NO_SEGMENT, dtype=np.int32)
+        self.special_time_segments = []
+        self.title_ids = None
+        self.title_table = None
+
+    def enable_titles(self, title_table):
+        self.title_ids = np.full(len(self.states), Data.NO_TITLE, dtype=np.int32)
+        self.title_table = title_table
+
+    @staticmethod
+    def get_required_len(first_time, last_time):
         delta1 = last_time - first_time
         assert (delta1.days == 0), str(delta1)
         if delta1.days > 0:
             print("WARNING: number of days =", delta1.days)
-        required_len = 1 + int(delta1.seconds) // DEFAULT_TIME_STEP_IN_SECONDS()
+        return 1 + int(delta1.seconds) // DEFAULT_TIME_STEP_IN_SECONDS()
+
+    def __len__(self):
+        return len(self.states)
+
+    def resize(self, required_len):
+        cur_len = len(self.states)
+        if required_len <= cur_len:
+            self.states = self.states[:required_len].copy()
+            self.segment_ids = self.segment_ids[:required_len].copy()
+            if self.title_ids is not None:
+                self.title_ids = self.title_ids[:required_len].copy()
+            return
+        self.states = np.concatenate((self.states, np.full(required_len - cur_len, Data.EMPTY_STATE, dtype=np.uint8)))
+        self.segment_ids = np.concatenate((self.segment_ids, np.full(required_len - cur_len, Data.NO_SEGMENT, dtype=np.int32)))
+        if self.title_ids is not None:
+            self.title_ids = np.concatenate((self.title_ids, np.full(required_len - cur_len, Data.NO_TITLE, dtype=np.int32)))
+
+    def reserve(self, required_len):
+        # Grows the timeline by whole chunks to be able to keep at least required_len time items
+        cur_len = len(self.states)
+        if required_len <= cur_len:
+            return
+        num_chunks = -(-(required_len - cur_len) // DEFAULT_TIMELINE_CHUNK_LEN())
+        self.resize(cur_len + num_chunks * DEFAULT_TIMELINE_CHUNK_LEN())
 
-        self.first_time = first_time
+    def set_last_time(self, last_time):
+        self.resize(Data.get_required_len(self.first_time, last_time))
         self.last_time = last_time
-        self.items = [None] * required_len
-        self.special_time_segments = []
 
+    def fill_state(self, begin_index, end_index, state):
+        self.states[begin_index:end_index] = state
+        self.segment_ids[begin_index:end_index] = Data.NO_SEGMENT
 
+    def fill_special_time_segment(self, begin_index, end_index, segment_index):
+        self.states[begin_index:end_index] = Data.EMPTY_STATE
+        self.segment_ids[begin_index:end_index] = segment_index
+
+    def to_packed(self):
+        # Converts the data to a dict of builtin types only, e.g. to be pickled without the reference to the class
+        return {"first_time": self.first_time,
+                "last_time": self.last_time,
+                "states": self.states.tobytes(),
+                "segment_ids": self.segment_ids.tobytes(),
+                "special_time_segments": [x.to_packed() for x in self.special_time_segments],
+                "title_ids": self.title_ids.tobytes() if self.title_ids is not None else None,
+                "titles": self.title_table.titles if self.title_table is not None else None}
+
+    @staticmethod
+    def from_packed(packed):
+        data = Data(packed["first_time"], packed["first_time"])
+        data.last_time = packed["last_time"]
+        data.states = np.frombuffer(packed["states"], dtype=np.uint8).copy()
+        data.segment_ids = np.frombuffer(packed["segment_ids"], dtype=np.int32).copy()
+        data.special_time_segments = [SpecialTimeSegment.from_packed(x) for x in packed["special_time_segments"]]
+        if packed["title_ids"] is not None:
+            data.title_ids = np.frombuffer(packed["title_ids"], dtype=np.int32).copy()
+            data.title_table = TitleTable(packed["titles"])
+        return data
 
+    def get_item(self, index):
+        segment_index = self.segment_ids[index]
+        if segment_index != Data.NO_SEGMENT:
+            return self.special_time_segments[segment_index]
+        state = self.states[index]
+        if state == Data.EMPTY_STATE:
+            return None
+        return State(state)
+
+    def get_items(self):
+        # Converts the timeline to the list of State / SpecialTimeSegment / None items, one item per slot
+        items = [None if x == Data.EMPTY_STATE else State(x) for x in self.states.tolist()]
+        for index in np.flatnonzero(self.segment_ids != Data.NO_SEGMENT).tolist():
+            items[index] = self.special_time_segments[self.segment_ids[index]]
+        return items
+
+    def get_runs(self, begin_index=0, end_index=None):
+        # Returns the run-length encoded timeline (of the range of time items, if it is passed)
+        states = self.states[begin_index:end_index]
+        segment_ids = self.segment_ids[begin_index:end_index]
+        if len(states) == 0:
+            return TimelineRuns(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), states, segment_ids,
+                                self.special_time_segments)
+        changes = np.flatnonzero((states[1:] != states[:-1]) | (segment_ids[1:] != segment_ids[:-1])) + 1
+        begins = np.concatenate(([0], changes))
+        lengths = np.diff(np.append(begins, len(states)))
+        return TimelineRuns(begins + begin_index, lengths, states[begins], segment_ids[begins], self.special_time_segments)
+
+class TimelineRuns:
+    # Run-length encoded timeline: the runs of consecutive time items with the same state and the same special time segment.
+    # The run i covers the time items from begins[i] to begins[i] + lengths[i] - 1 and has states[i] and segment_ids[i]
+    # (the same values as in the arrays of Data), so a day is a few hundred runs instead of thousands of time items.
+    def __init__(self, begins, lengths, states, segment_ids, special_time_segments):
+        self.begins = begins
+        self.lengths = lengths
+        self.states = states
+        self.segment_ids = segment_ids
+        self.special_time_segments = special_time_segments
+
+    def __len__(self):
+        return len(self.begins)
+
+    def get_items(self):
+        # Returns the list of State / SpecialTimeSegment / None items, one item per run
+        return [self.special_time_segments[segment_index] if segment_index != Data.NO_SEGMENT
+                else (None if state == Data.EMPTY_STATE else State(state))
+                for (state, segment_index) in zip(self.states.tolist(), self.segment_ids.tolist())]
+
+    def count_items(self, states):
+        # Returns the number of time items with any of the states
+        return int(self.lengths[np.isin(self.states, states)].sum())
+
+    def count_items_for_segments(self):
+        # Returns the array with the number of time items referring to each special time segment
+        has_segment = (self.segment_ids != Data.NO_SEGMENT)
+        return np.bincount(self.segment_ids[has_segment], weights=self.lengths[has_segment],
+                           minlength=len(self.special_time_segments)).astype(np.int64)
 
 
 class FirstLastTimeDetector:
@@ -242,12 +507,13 @@ class FirstLastTimeDetector:
         if not line_sequence:
             return (None, None)
 
+        timestamp_decoder = TimestampDecoder()
         for line in line_sequence:
             date_match = date_re.match(line)
             if not date_match:
                 continue
             cur_time_str = date_match.group()
-            cur_time = datetime.datetime.strptime(cur_time_str, "%Y-%m-%d_%H-%M-%S")
+            cur_time = timestamp_decoder.decode_to_datetime(cur_time_str)
             if not first_time:
                 first_time = cur_time
             last_time = cur_time
@@ -266,30 +532,52 @@ class FirstLastTimeDetector:
             return (first_time2, last_time2)
         return ( min(first_time1, first_time2), max(last_time1, last_time2) )
 
+def peek_first_time_in_line_sequence(line_sequence):
+    # Returns the time of the first line with a timestamp (or None) and the line sequence that yields all the lines
+    # of the passed one; only the lines up to the first timestamp are read, so line_sequence may be a generator
+    line_iterator = iter(line_sequence)
+    lines_before = []
+    for line in line_iterator:
+        lines_before.append(line)
+        date_match = date_re.match(line)
+        if date_match:
+            cur_time = TimestampDecoder().decode_to_datetime(date_match.group())
+            return (cur_time, itertools.chain(lines_before, line_iterator))
+    return (None, lines_before)
+
 class Reader:
-    def __init__(self, line_sequence, name, first_time, last_time, is_remote):
+    # Parses the line sequence in one pass: the timeline starts at first_time and grows while the lines are read,
+    # after parsing the last_time of the returned data is the time of the last timestamp
+    def __init__(self, line_sequence, name, first_time, is_remote, title_table=None):
+        # If title_table is passed, the timestamp lines should be "<timestamp> <title id in title_table>"
+        # (see iterate_titled_line_sequence_from_file), and the title ids are kept in data.title_ids
         self.line_sequence = line_sequence
         self.name = name
         self.first_time = first_time
-        self.last_time = last_time
         self.is_remote = is_remote;
+        self.title_table = title_table
+        self.timestamp_decoder = TimestampDecoder()
 
         #state
-        self.clean_state(prev_index = None, prev_time = None)
+        self.clean_state(prev_index = None, prev_seconds = None)
+
+    def get_time(self, seconds_from_first_time):
+        return self.first_time + datetime.timedelta(seconds = seconds_from_first_time)
 
-    def clean_state(self, prev_index, prev_time):
-#        print("clean_state: prev_index =", prev_index, "prev_time =", prev_time)
+    def clean_state(self, prev_index, prev_seconds):
+#        print("clean_state: prev_index =", prev_index, "prev_seconds =", prev_seconds)
         self.prev_filled_index = prev_index
-        self.prev_filled_time = prev_time
+        self.prev_filled_seconds = prev_seconds # the time of the previous timestamp as the number of seconds from first_time
         self.is_rest = False
         self.is_rest_definitely = False
         self.is_rest_q = False
         self.total_sum_rest_minutes_for_block = 0
+        self.active_for_seconds = None
 
-    def fill_indexes_in_data(self, data, cur_index, cur_time):
-        assert( (cur_index >= 0) and isinstance(data, Data) and (cur_index < len(data.items)) )
+    def fill_indexes_in_data(self, data, cur_index, cur_seconds):
+        assert( (cur_index >= 0) and isinstance(data, Data) and (cur_index < len(data)) )
 
-        data.items[cur_index] = State.must_be_work
+        data.fill_state(cur_index, cur_index+1, State.must_be_work)
 
         if self.prev_filled_index == None:
             return
@@ -301,23 +589,31 @@ class Reader:
             return #TODO: think about that
 
         prev = self.prev_filled_index #just alias
-#        print("prev =", prev, "cur_index =", cur_index, "len(data.items) =", len(data.items))
-        assert( (prev >= 0) and (prev < len(data.items)) and (prev < cur_index))
+#        print("prev =", prev, "cur_index =", cur_index, "len(data) =", len(data))
+        assert( (prev >= 0) and (prev < len(data)) and (prev < cur_index))
 
+        prev_time = self.get_time(self.prev_filled_seconds)
+        cur_time = self.get_time(cur_seconds)
         cur_state = None
+        cur_segment_index = None
         if not self.is_rest and not self.is_rest_q and not self.is_rest_definitely:
-            cur_state = State.may_be_work
+            # the heartbeats of the event log mode are expanded back to the time items of work
+            is_active = (self.active_for_seconds is not None) and (cur_seconds - self.prev_filled_seconds <= self.active_for_seconds)
+            cur_state = State.must_be_work if is_active else State.may_be_work
+            if is_active and data.title_ids is not None:
+                # the window was the same up to the next record
+                data.title_ids[prev+1:cur_index] = data.title_ids[prev]
         elif self.is_rest_q and self.is_rest_definitely:
-            print("WARNING: in the '{}' in the time segment from {} to {} both 'definitely rest' and 'may be rest' marks are present " \
-                    + "-- make the segment to be 'definitely rest'").format(self.name, self.prev_filled_time, self.cur_time)
+            print(("WARNING: in the '{}' in the time segment from {} to {} both 'definitely rest' and 'may be rest' marks are present " \
+                    + "-- make the segment to be 'definitely rest'").format(self.name, prev_time, cur_time))
             cur_state = State.must_be_rest
         elif self.is_rest and self.is_rest_definitely:
-            print("WARNING: in the '{}' in the time segment from {} to {} both 'definitely rest' and 'rest' marks are present " \
-                    + "-- make the segment to be 'definitely rest'").format(self.name, self.prev_filled_time, self.cur_time)
+            print(("WARNING: in the '{}' in the time segment from {} to {} both 'definitely rest' and 'rest' marks are present " \
+                    + "-- make the segment to be 'definitely rest'").format(self.name, prev_time, cur_time))
             cur_state = State.must_be_rest
         elif self.is_rest and self.is_rest_q:
-            print("WARNING: in the '{}' in the time segment from {} to {} both 'may be rest' and 'rest' marks are present " \
-                    + "-- make the segment to be 'may be rest'").format(self.name, self.prev_filled_time, cur_time)
+            print(("WARNING: in the '{}' in the time segment from {} to {} both 'may be rest' and 'rest' marks are present " \
+                    + "-- make the segment to be 'may be rest'").format(self.name, prev_time, cur_time))
             cur_state = State.may_be_rest
         elif  self.is_rest_definitely:
             cur_state = State.must_be_rest
@@ -328,7 +624,7 @@ class Reader:
             if self.is_remote:
                 cur_state = State.may_be_rest
             else:
-                spec_time_segment = SpecialTimeSegment(self.prev_filled_time, cur_time, self.total_sum_rest_minutes_for_block)
+                spec_time_segment = SpecialTimeSegment(prev_time, cur_time, self.total_sum_rest_minutes_for_block)
 
                 if spec_time_segment.num_items_work <= 1 + 60.0 / DEFAULT_TIME_STEP_IN_SECONDS():
                     cur_state = State.may_be_rest
@@ -336,23 +632,39 @@ class Reader:
                     cur_state = State.may_be_work
                 else:
                     data.special_time_segments.append(spec_time_segment)
-                    last_index = len(data.special_time_segments) - 1
-                    cur_state = data.special_time_segments[last_index]
+                    cur_segment_index = len(data.special_time_segments) - 1
 
         if self.is_remote and (cur_state == State.must_be_rest):
             cur_state = State.may_be_rest
 
-        for index in range(prev+1, cur_index):
-            data.items[index] = cur_state
-
-        pass
+        if cur_segment_index is not None:
+            data.fill_special_time_segment(prev+1, cur_index, cur_segment_index)
+        else:
+            data.fill_state(prev+1, cur_index, cur_state)
 
 
     def parse(self):
-        data = Data(self.first_time, self.last_time)
-        self.clean_state(prev_index = None, prev_time = None)
+        self.start()
+        self.feed(self.line_sequence)
+        return self.finish()
+
+    def start(self):
+        self.data = Data(self.first_time, self.first_time)
+        if self.title_table is not None:
+            self.data.enable_titles(self.title_table)
+        self.clean_state(prev_index = None, prev_seconds = None)
+        self.last_seconds = 0
+
+    def finish(self):
+        self.data.set_last_time(self.get_time(self.last_seconds))
+        return self.data
+
+    def feed(self, line_sequence):
+        # Parses the next lines of the log, may be called several times between start() and finish()
+        data = self.data
+        (first_date_ordinal, first_seconds) = TimestampDecoder.from_datetime(self.first_time)
 
-        for line in self.line_sequence:
+        for line in line_sequence:
             is_empty_line = (len(line.strip()) == 0)
             if is_empty_line:
                 continue
@@ -361,15 +673,22 @@ class Reader:
             rest_match = rest_re.match(line)
             rest_d_match = rest_d_re.match(line)
             rest_q_match = rest_q_re.match(line)
+            active_match = active_re.match(line)
 
             if date_match:
                 cur_time_str = date_match.group()
-                cur_time = datetime.datetime.strptime(cur_time_str, "%Y-%m-%d_%H-%M-%S")
-                cur_index = get_index_for_time(cur_time, self.first_time)
-                assert( (cur_index >= 0) and (cur_index < len(data.items)) )
-                self.fill_indexes_in_data(data, cur_index, cur_time)
-
-                self.clean_state(prev_index = cur_index, prev_time = cur_time)
+                (cur_date_ordinal, cur_seconds) = self.timestamp_decoder.decode(cur_time_str)
+                cur_seconds += (cur_date_ordinal - first_date_ordinal) * SECONDS_IN_DAY() - first_seconds
+                assert (0 <= cur_seconds < SECONDS_IN_DAY()), cur_time_str
+                cur_index = cur_seconds // DEFAULT_TIME_STEP_IN_SECONDS()
+                data.reserve(cur_index + 1)
+                assert( (cur_index >= 0) and (cur_index < len(data)) )
+                self.fill_indexes_in_data(data, cur_index, cur_seconds)
+                self.last_seconds = cur_seconds
+                if self.title_table is not None:
+                    data.title_ids[cur_index] = int(line[date_match.end():])
+
+                self.clean_state(prev_index = cur_index, prev_seconds = cur_seconds)
 
                 continue
 
@@ -383,7 +702,17 @@ class Reader:
             if rest_d_match:
                 self.is_rest_definitely = True
 
-        return data
+            if active_match:
+                self.active_for_seconds = int(active_match.group(1))
+
+def _indexes_to_ranges(indexes):
+    # Converts a sorted array of indexes to the list of pairs (first_index, last_index) of consecutive indexes
+    if len(indexes) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(indexes) != 1)
+    firsts = np.concatenate(([indexes[0]], indexes[breaks + 1]))
+    lasts = np.concatenate((indexes[breaks], [indexes[-1]]))
+    return list(zip(firsts.tolist(), lasts.tolist()))
 
 def merge_data(data1, data2):
     if (data1 == None):
@@ -391,100 +720,157 @@ def merge_data(data1, data2):
     if (data2 == None):
         return data1
 
-    data_loc = copy.deepcopy(data1)
-    data_rem = copy.deepcopy(data2)
+    data_loc = data1
+    data_rem = data2
     #data_loc is local
     #data_rem is remote
     assert(isinstance(data_loc, Data))
     assert(isinstance(data_rem, Data))
-    assert(len(data_loc.items) == len(data_rem.items))
+    assert(len(data_loc) == len(data_rem))
     assert(data_loc.first_time == data_rem.first_time)
     assert(data_loc.last_time == data_rem.last_time)
+    assert(not np.any(data_rem.segment_ids != Data.NO_SEGMENT))
+    assert(not np.any(data_rem.states == State.must_be_rest))
 
     merged_data = Data(data_loc.first_time, data_loc.last_time)
-    merged_data.special_time_segments = data_loc.special_time_segments
+    # the segments are copied, since the numbers of rest items in them are changed below
+    merged_data.special_time_segments = [copy.copy(x) for x in data_loc.special_time_segments]
+
+    # The values of State follow the order may_be_rest < may_be_work < must_be_rest < must_be_work
+    # and EMPTY_STATE is less than all of them, so for "normal" states it is sufficient to make maximum
+    np.maximum(data_loc.states, data_rem.states, out=merged_data.states)
+
+    has_segment = (data_loc.segment_ids != Data.NO_SEGMENT)
+    is_rem_work = (data_rem.states == State.may_be_work) | (data_rem.states == State.must_be_work)
+
+    # special time segment + may_be_rest => this special time segment without changes
+    keeps_segment = has_segment & ~is_rem_work
+    merged_data.states[keeps_segment] = Data.EMPTY_STATE
+    merged_data.segment_ids[keeps_segment] = data_loc.segment_ids[keeps_segment]
+
+    # special time segment + must_be_work/may_be_work => the remote state (it is already set by the maximum above),
+    # and the number of rest items in the special time segment is decreased by the number of such items
+    num_decreased_rest_items = np.bincount(data_loc.segment_ids[has_segment & is_rem_work],
+                                           minlength=len(merged_data.special_time_segments))
+    for (segment, num_items) in zip(merged_data.special_time_segments, num_decreased_rest_items.tolist()):
+        segment.num_items_rest -= num_items
+
+    conflict_indexes = np.flatnonzero((data_loc.states == State.must_be_rest) & (data_rem.states == State.must_be_work))
+    if len(conflict_indexes) > 0:
+        str_ranges = ["{} => {}".format(get_time_for_index(first_index, merged_data.first_time).strftime("%H:%M:%S"),
+                                        get_time_for_index(last_index, merged_data.first_time).strftime("%H:%M:%S"))
+                      for (first_index, last_index) in _indexes_to_ranges(conflict_indexes)]
+        print("Warning: conflict during merging, setting must_be_work state: in {} time items item1 is {} whereas item2 is {}, "
+              "the time segments are: {}".format(len(conflict_indexes), State.must_be_rest.name, State.must_be_work.name, str_ranges))
 
-    for index in range(0, len(merged_data.items)):
-        item1 = data_loc.items[index]
-        item2 = data_rem.items[index]
-
-        if item1 == None:
-            merged_data.items[index] = item2
-            continue
-        if item2 == None:
-            merged_data.items[index] = item1
-            continue
-
-        assert(isinstance(item2, State))
-        assert(item2 != State.must_be_rest)
-
-        if (isinstance(item1, State) and isinstance(item2, State)): #simple case
-
-            if (item1 == item2):
-                merged_data.items[index] = item1
-                continue
-
-            if (item1 == State.must_be_rest) and (item2 == State.must_be_work):
-                print("Warning: conflict during merging, setting must_be_work state: in the time item with index {} " \
-                        + "(corresponds {}) item1 is {} whereas item2 is {}").format(index, get_time_for_index(index, merged_data.first_time), item1, item2)
-                merged_data.items[index] = State.must_be_work
-                continue
-
-
-            merged_data.items[index] = max(item1, item2)
-            continue
-
-
-        if isinstance(item1, SpecialTimeSegment):
-            if item2 == State.may_be_rest:
-                merged_data.items[index] = item1
-                continue
-            if (item2 == State.must_be_work) or (item2 == State.may_be_work):
-                merged_data.items[index] = item2
-                item1.num_items_rest -= 1
-                continue
-            raise RuntimeError()
-        pass
     return merged_data
 
-def calculate_time_info(data):
+def merge_data_of_machines(data_local, remote_data_list, machine_names):
+    # N-way version of merge_data: merges the local data with the data of several remote machines
+    # using the same rules as merge_data (the remote data are treated as one remote data with the maximal state of them).
+    # The timelines are swept once as lists of runs: the runs of all the data are merged by a heap on their begins,
+    # so the cost depends on the number of runs, not on the number of time items.
+    # machine_names are the names of the local and the remote machines.
+    # Returns the merged data and the list of work sources -- tuples (first_index, last_index, machine name)
+    # with the machine that gave the work state of the merged data in these time items.
+    all_data = [data_local] + list(remote_data_list)
+    assert(len(machine_names) == len(all_data))
+    for data in all_data:
+        assert(isinstance(data, Data))
+        assert(len(data) == len(data_local))
+        assert(data.first_time == data_local.first_time)
+        assert(data.last_time == data_local.last_time)
+    for data in remote_data_list:
+        assert(not np.any(data.segment_ids != Data.NO_SEGMENT))
+        assert(not np.any(data.states == State.must_be_rest))
+
+    merged_data = Data(data_local.first_time, data_local.last_time)
+    merged_data.special_time_segments = [copy.copy(x) for x in data_local.special_time_segments]
+
+    all_runs = [data.get_runs() for data in all_data]
+    all_states = [runs.states.tolist() for runs in all_runs]
+    local_segment_ids = all_runs[0].segment_ids.tolist()
+    cur_run_indexes = [0] * len(all_data)
+    work_states = (State.may_be_work, State.must_be_work)
+
+    work_sources = []
+    conflict_ranges = []
+    # the begins of the runs of all the data in the order of time, the end of the timeline is the last boundary
+    boundaries = heapq.merge(*[[(begin, data_index, run_index) for (run_index, begin) in enumerate(runs.begins.tolist())]
+                               for (data_index, runs) in enumerate(all_runs)])
+    boundaries = itertools.chain(boundaries, [(len(merged_data), None, None)])
+    (prev_begin, data_index, run_index) = next(boundaries)
+    cur_run_indexes[data_index] = run_index
+    for (begin, data_index, run_index) in boundaries:
+        if begin != prev_begin:
+            # all the data have constant states in the time items from prev_begin to begin-1
+            states = [x[y] for (x, y) in zip(all_states, cur_run_indexes)]
+            local_segment_index = local_segment_ids[cur_run_indexes[0]]
+            max_state = max(states)
+            max_remote_state = max(states[1:], default=Data.EMPTY_STATE)
+            if (local_segment_index != Data.NO_SEGMENT) and (max_remote_state not in work_states):
+                merged_data.fill_special_time_segment(prev_begin, begin, local_segment_index)
+            else:
+                if local_segment_index != Data.NO_SEGMENT:
+                    merged_data.special_time_segments[local_segment_index].num_items_rest -= begin - prev_begin
+                merged_data.fill_state(prev_begin, begin, max_state)
+                if max_state in work_states:
+                    machine_name = machine_names[states.index(max_state)]
+                    if work_sources and (work_sources[-1][1] == prev_begin - 1) and (work_sources[-1][2] == machine_name):
+                        work_sources[-1] = (work_sources[-1][0], begin - 1, machine_name)
+                    else:
+                        work_sources.append((prev_begin, begin - 1, machine_name))
+            if (states[0] == State.must_be_rest) and (max_remote_state == State.must_be_work):
+                if conflict_ranges and (conflict_ranges[-1][1] == prev_begin - 1):
+                    conflict_ranges[-1] = (conflict_ranges[-1][0], begin - 1)
+                else:
+                    conflict_ranges.append((prev_begin, begin - 1))
+            prev_begin = begin
+        if data_index is not None:
+            cur_run_indexes[data_index] = run_index
+
+    if conflict_ranges:
+        str_ranges = ["{} => {}".format(get_time_for_index(first_index, merged_data.first_time).strftime("%H:%M:%S"),
+                                        get_time_for_index(last_index, merged_data.first_time).strftime("%H:%M:%S"))
+                      for (first_index, last_index) in conflict_ranges]
+        print("Warning: conflict during merging, setting must_be_work state: in {} time items the local item is {} whereas "
+              "a remote item is {}, the time segments are: {}".format(sum(y - x + 1 for (x, y) in conflict_ranges),
+                                                                      State.must_be_rest.name, State.must_be_work.name, str_ranges))
+
+    return (merged_data, work_sources)
+
+def calculate_time_info(data, begin_index=0, end_index=None, first_segment_index=0):
+    # If the range of time items is passed, the info is calculated only for the items in the range and for
+    # the special time segments starting from first_segment_index
+    # (it allows to update the info when new items are parsed, see LogFollower)
     if data is None:
         return None
 
-    num_rest_items_from_list = 0;
-    num_work_items_from_list = 0;
+    runs = data.get_runs(begin_index, end_index)
+    special_time_segments = data.special_time_segments[first_segment_index:]
 
-    for item in data.items:
-        if item == None:
-            continue
+    num_rest_items_from_list = runs.count_items([State.may_be_rest, State.must_be_rest])
+    num_work_items_from_list = runs.count_items([State.may_be_work, State.must_be_work])
 
-        if item in (State.may_be_work, State.must_be_work):
-            num_work_items_from_list += 1
-            continue
+    # number of slots that still refer to each special time segment
+    num_slots_for_segments = runs.count_items_for_segments()[first_segment_index:]
 
-        if item in (State.may_be_rest, State.must_be_rest):
-            num_rest_items_from_list += 1
+    for (item, num_slots) in zip(special_time_segments, num_slots_for_segments.tolist()):
+        if (item.num_items_rest >=0) and (item.num_items_work >= 0):
+            continue #will be handled below
+        if (item.num_items_rest <=0) and (item.num_items_work <= 0):
+            continue #should not be handled
+        if (item.num_items_rest < 0):
+            num_work_items_from_list += num_slots
+            continue
+        if (item.num_items_work < 0):
+            num_rest_items_from_list += num_slots
             continue
-
-        if isinstance(item, SpecialTimeSegment):
-            if (item.num_items_rest >=0) and (item.num_items_work >= 0):
-                continue #will be handled below
-            if (item.num_items_rest <=0) and (item.num_items_work <= 0):
-                continue #should not be handled
-            if (item.num_items_rest < 0):
-                num_work_items_from_list += 1
-                continue
-            if (item.num_items_work < 0):
-                num_rest_items_from_list += 1
-                continue
-
-        print("ERROR: item =", item)
-        raise RuntimeError()
 
     num_rest_items = num_rest_items_from_list
     num_work_items = num_work_items_from_list
 
-    for item in data.special_time_segments:
+    for item in special_time_segments:
         if (item.num_items_rest < 0) or (item.num_items_work < 0):
             continue #are handled above
         num_rest_items += item.num_items_rest
@@ -495,6 +881,15 @@ def calculate_time_info(data):
             "num_rest_items": num_rest_items,
             "num_work_items": num_work_items}
 
+def empty_time_info():
+    return { "num_rest_items_from_list": 0,
+            "num_work_items_from_list": 0,
+            "num_rest_items": 0,
+            "num_work_items": 0}
+
+def add_time_infos(time_info1, time_info2):
+    return {k: time_info1[k] + time_info2[k] for k in time_info1}
+
 def str_timedelta(td, num_colons=1):
     if td < datetime.timedelta():
         str_sign = '-'
@@ -532,16 +927,20 @@ def print_data_as_list(data, should_shorten = False, num_minutes_to_print_in_sho
         return
 
     assert(isinstance(data, Data))
-    prev_item = data.items[0]
-    prev_index = 0
+    runs = data.get_runs()
+    num_runs = len(runs)
 
     list_rests = []
 
-    for (cur_index, cur_item) in enumerate(data.items):
-        if (cur_item == prev_item) and (cur_index+1 != len(data.items)):
-            continue
+    for (run_index, (prev_index, run_len, prev_item)) in enumerate(zip(runs.begins.tolist(), runs.lengths.tolist(), runs.get_items())):
+        if run_index + 1 < num_runs:
+            last_index = prev_index + run_len - 1
+        elif (run_index > 0) and (run_len == 1):
+            break
+        else:
+            last_index = len(data) - 2 # the last time item is not included into the printed time segments
         prev_time = get_time_for_index(prev_index, data.first_time)
-        cur_time = get_time_for_index(cur_index-1, data.first_time)
+        cur_time = get_time_for_index(last_index, data.first_time)
         diff_time = cur_time - prev_time
         diff_time_min = diff_time.seconds // 60
 
@@ -569,9 +968,6 @@ def print_data_as_list(data, should_shorten = False, num_minutes_to_print_in_sho
         if ( (prev_item == State.must_be_rest) or (prev_item == State.may_be_rest) ) and (diff_time_min > 2):
             list_rests.append(diff_time_min)
 
-        prev_index = cur_index
-        prev_item = cur_item
-
     print("rests from lists:", list_rests)
     rests_from_spec_time_segments = [ int(x.num_items_rest) * DEFAULT_TIME_STEP_IN_SECONDS() // 60 for x in data.special_time_segments ]
     print("rests from special time segments:", rests_from_spec_time_segments)
@@ -613,23 +1009,20 @@ def print_data_as_table(data1, data2 = None, data3 = None):
 
     num_items = get_index_for_time(last_time, first_time) + 1
 
-    table_rows = []
-    for cur_index in range(num_items):
-        index1 = convert_index_to_another_time_array(cur_index, first_time, data1.first_time)
-        item1 = data1.items[index1]
-        item2 = None
-        item3 = None
-        if data2:
-            index2 = convert_index_to_another_time_array(cur_index, first_time, data2.first_time)
-            item2 = data2.items[index2]
-        if data3:
-            index3 = convert_index_to_another_time_array(cur_index, first_time, data3.first_time)
-            item3 = data3.items[index3]
-
-        cur_time = get_time_for_index(cur_index, first_time)
-        str_cur_time = cur_time.strftime("%H:%M:%S")
-
-        table_rows.append([str_cur_time, str_for_item(item1), str_for_item(item2), str_for_item(item3)])
+    def strs_for_data(data):
+        # The strings are made once per run and then repeated for the time items of the run
+        if not data:
+            return [str_for_item(None)] * num_items
+        runs = data.get_runs()
+        strs_for_runs = np.array([str_for_item(x) for x in runs.get_items()], dtype=object)
+        strs_for_items = np.repeat(strs_for_runs, runs.lengths)
+        indexes = (np.arange(num_items) * DEFAULT_TIME_STEP_IN_SECONDS()
+                   + int((first_time - data.first_time).total_seconds())) // DEFAULT_TIME_STEP_IN_SECONDS()
+        assert( (indexes[0] >= 0) and (indexes[-1] < len(data)) )
+        return strs_for_items[indexes].tolist()
+
+    strs_for_times = [get_time_for_index(x, first_time).strftime("%H:%M:%S") for x in range(num_items)]
+    table_rows = [list(x) for x in zip(strs_for_times, strs_for_data(data1), strs_for_data(data2), strs_for_data(data3))]
     print_table(table_rows)
 
 def _skip_up_to_char(s, c):
@@ -637,108 +1030,347 @@ def _skip_up_to_char(s, c):
         return s
     return s[s.rindex(c)+1:]
 
-def main_for_line_sequences(line_sequence1, line_sequence2, name1, name2, should_print_whole_table,
-                            very_short_print=False,
-                            target_time_table=None):
-    LEN_SMALL_HRULE = 60
-    LEN_BIG_HRULE = 80
-    HRULE = "=" * LEN_SMALL_HRULE
-    HEADING_HRULE = "=" * LEN_BIG_HRULE
-    what_parsing = "parsing {} and {}".format(name1, name2)
-
-    print(HEADING_HRULE)
-    print("Begin " + what_parsing)
-
-    (total_first_time, total_last_time) = FirstLastTimeDetector.get_first_last_time_from_line_sequences(line_sequence1, line_sequence2)
+def HRULE():
+    return "=" * 60
 
-    if line_sequence1:
-        reader1 = Reader(line_sequence1, name1, total_first_time, total_last_time, is_remote=False)
-    else:
-        reader1 = None
-
-    if line_sequence2:
-        reader2 = Reader(line_sequence2, name2, total_first_time, total_last_time, is_remote=True)
-    else:
-        reader2 = None
+def HEADING_HRULE():
+    return "=" * 80
 
-    if reader1:
-        data1 = reader1.parse()
+def load_target_time_table(target_time_table_path):
+    # The time table is a YAML file with dict {<date>: <target time in hours>}, see --target-time-table
+    if not target_time_table_path:
+        return None
+    with open(target_time_table_path) as f:
+        return yaml.safe_load(f)
+
+def get_target_time_in_hours(name, target_time_table):
+    if not target_time_table:
+        return DEFAULT_TARGET_TIME_IN_HOURS()
+    name_for_time_table = name
+    name_for_time_table = _skip_up_to_char(name_for_time_table, '_')
+    name_for_time_table = _skip_up_to_char(name_for_time_table, '/')
+    return target_time_table.get(name_for_time_table, DEFAULT_TARGET_TIME_IN_HOURS())
+
+def parse_line_sequences(line_sequence1, line_sequence2, name1, name2, title_table=None):
+    (first_time1, line_sequence1) = peek_first_time_in_line_sequence(line_sequence1 or [])
+    (first_time2, line_sequence2) = peek_first_time_in_line_sequence(line_sequence2 or [])
+    first_times = [x for x in (first_time1, first_time2) if x is not None]
+    total_first_time = FirstLastTimeDetector.round_sec_in_datetime(min(first_times), should_floor = True) if first_times else None
+
+    if first_time1:
+        data1 = Reader(line_sequence1, name1, total_first_time, is_remote=False, title_table=title_table).parse()
     else:
         data1 = None
 
-    if reader2:
-        data2 = reader2.parse()
+    if first_time2:
+        data2 = Reader(line_sequence2, name2, total_first_time, is_remote=True).parse()
     else:
         data2 = None
 
-    data_merged = merge_data(data1, data2)
+    parsed_data = [x for x in (data1, data2) if x is not None]
+    if parsed_data:
+        total_last_time = FirstLastTimeDetector.round_sec_in_datetime(max(x.last_time for x in parsed_data), should_floor = False)
+        for x in parsed_data:
+            x.set_last_time(total_last_time)
 
-    time_info = calculate_time_info(data_merged)
-
-    print((HRULE))
+    data_merged = merge_data(data1, data2)
+    return (data1, data2, data_merged)
+
+def parse_line_sequences_of_machines(local_line_sequence, remote_line_sequences, machine_names):
+    # The same as parse_line_sequences, but for several remote line sequences, see merge_data_of_machines
+    # Returns the local data, the list of the remote data, the merged data and the work sources
+    first_times_and_line_sequences = [peek_first_time_in_line_sequence(x or [])
+                                      for x in [local_line_sequence] + list(remote_line_sequences)]
+    first_times = [x for (x, _) in first_times_and_line_sequences if x is not None]
+    if not first_times:
+        return (None, [], None, [])
+    total_first_time = FirstLastTimeDetector.round_sec_in_datetime(min(first_times), should_floor = True)
+
+    all_data = []
+    for (machine_index, (first_time, line_sequence)) in enumerate(first_times_and_line_sequences):
+        if first_time:
+            data = Reader(line_sequence, machine_names[machine_index], total_first_time, is_remote=(machine_index > 0)).parse()
+        else:
+            data = Data(total_first_time, total_first_time)
+        all_data.append(data)
+
+    total_last_time = FirstLastTimeDetector.round_sec_in_datetime(max(x.last_time for x in all_data), should_floor = False)
+    for x in all_data:
+        x.set_last_time(total_last_time)
+
+    (data_merged, work_sources) = merge_data_of_machines(all_data[0], all_data[1:], machine_names)
+    return (all_data[0], all_data[1:], data_merged, work_sources)
+
+def print_work_sources(work_sources, first_time):
+    num_items_by_machines = {}
+    for (first_index, last_index, machine_name) in work_sources:
+        print("{} => {}: {}".format(get_time_for_index(first_index, first_time).strftime("%H:%M:%S"),
+                                    get_time_for_index(last_index, first_time).strftime("%H:%M:%S"), machine_name))
+        num_items_by_machines[machine_name] = num_items_by_machines.get(machine_name, 0) + last_index - first_index + 1
+    for (machine_name, num_items) in num_items_by_machines.items():
+        print("work on {} = {}".format(machine_name, str_timedelta(num_items * DEFAULT_TIME_STEP_AS_TIMEDELTA())))
+
+def print_report_header(name1, name2):
+    print(HEADING_HRULE())
+    print("Begin parsing {} and {}".format(name1, name2))
+
+def print_report(data1, data2, data_merged, time_info, name1, name2, should_print_whole_table,
+                 very_short_print=False,
+                 target_time_table=None,
+                 remote_data_by_machines=None,
+                 work_sources=None):
+    # If remote_data_by_machines (dict {machine name: data}) is passed, it is printed instead of data2
+    print(HRULE())
     if not very_short_print:
         print("Local")
         print_data_as_list(data1)
         print("")
-        print("Remote")
-        print_data_as_list(data2)
-        print("")
+        if remote_data_by_machines is None:
+            print("Remote")
+            print_data_as_list(data2)
+            print("")
+        else:
+            for (machine_name, remote_data) in remote_data_by_machines.items():
+                print("Remote", machine_name)
+                print_data_as_list(remote_data)
+                print("")
         print("Merged")
         print_data_as_list(data_merged)
 
-        print(HRULE)
+        print(HRULE())
     print("Merged shortened")
     num_minutes_to_print_in_short = 2 if not very_short_print else 10
     print_data_as_list(data_merged, True, num_minutes_to_print_in_short=num_minutes_to_print_in_short)
 
+    if work_sources is not None:
+        print(HRULE())
+        print("Work sources")
+        print_work_sources(work_sources, data_merged.first_time)
+
     if should_print_whole_table:
-        print(HRULE)
+        print(HRULE())
         print_data_as_table(data1, data2, data_merged)
 
-    print(HRULE)
+    print(HRULE())
+    target_time_in_hours = get_target_time_in_hours(name1, target_time_table)
     if target_time_table:
-        name_for_time_table = name1
-        name_for_time_table = _skip_up_to_char(name_for_time_table, '_')
-        name_for_time_table = _skip_up_to_char(name_for_time_table, '/')
-        target_time_in_hours = target_time_table.get(name_for_time_table, DEFAULT_TARGET_TIME_IN_HOURS())
         print(f'target_time_in_hours={target_time_in_hours}')
-    else:
-        target_time_in_hours = DEFAULT_TARGET_TIME_IN_HOURS()
 
     time_to_should_work_for_target = calc_time_to_should_work_for_target(time_info, target_time_in_hours)
     print_time_info(time_info, time_to_should_work_for_target)
 
-    print(HRULE)
-    print("End " + what_parsing)
-    print(HEADING_HRULE)
+    print(HRULE())
+    print("End parsing {} and {}".format(name1, name2))
+    print(HEADING_HRULE())
     return time_to_should_work_for_target
 
+def main_for_line_sequences(line_sequence1, line_sequence2, name1, name2, should_print_whole_table,
+                            very_short_print=False,
+                            target_time_table=None):
+    print_report_header(name1, name2)
+    (data1, data2, data_merged) = parse_line_sequences(line_sequence1, line_sequence2, name1, name2)
+    time_info = calculate_time_info(data_merged)
+    return print_report(data1, data2, data_merged, time_info, name1, name2, should_print_whole_table,
+                        very_short_print=very_short_print,
+                        target_time_table=target_time_table)
+
 def read_line_sequence_from_file(file_path):
     with open(file_path, encoding="utf8", errors='ignore') as f:
         lines = list(f)
     return lines
 
+def iterate_line_sequence_from_file(file_path):
+    with open(file_path, encoding="utf8", errors='ignore') as f:
+        yield from f
+
+def iterate_reduced_line_sequence_from_file(file_path):
+    # Yields only the lines that are required for parsing: the timestamps without the rest of their lines
+    # (so the window titles are not decoded at all) and the lines beginning with "rest".
+    # The file is memory-mapped and scanned by the bytes regex, the other lines are skipped without decoding.
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iterate_reduced_line_sequence_from_buffer(mm)
+
+def iterate_reduced_line_sequence_from_buffer(buffer):
+    first_match = first_needed_line_part_bytes_re.match(buffer)
+    matches = needed_line_part_bytes_re.finditer(buffer)
+    if first_match:
+        matches = itertools.chain([first_match], matches)
+    for match in matches:
+        timestamp_bytes = match.group(1)
+        if timestamp_bytes is not None:
+            yield timestamp_bytes.decode("ascii")
+        else:
+            yield match.group(2).decode("utf8", errors='ignore')
+
+def read_reduced_line_sequence_from_file(file_path):
+    return list(iterate_reduced_line_sequence_from_file(file_path))
+
+def iterate_titled_line_sequence_from_file(file_path, title_table):
+    # The same as iterate_reduced_line_sequence_from_file, but each timestamp is followed by the id of the window title
+    # of its line: "<timestamp> <title id>". The titles are interned in title_table when the file is read,
+    # so a title is decoded once per file and the lines do not keep the titles
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iterate_titled_line_sequence_from_buffer(mm, title_table)
+
+def iterate_titled_line_sequence_from_buffer(buffer, title_table):
+    title_ids_by_title_bytes = {}
+    first_match = first_titled_line_part_bytes_re.match(buffer)
+    matches = titled_line_part_bytes_re.finditer(buffer)
+    if first_match:
+        matches = itertools.chain([first_match], matches)
+    for match in matches:
+        timestamp_bytes = match.group(1)
+        if timestamp_bytes is None:
+            yield match.group(3).decode("utf8", errors='ignore')
+            continue
+        title_match = window_title_tail_bytes_re.match(match.group(2))
+        title_bytes = title_match.group(1) if title_match else b""
+        title_id = title_ids_by_title_bytes.get(title_bytes)
+        if title_id is None:
+            title_id = title_table.get_id(title_bytes.decode("utf8", errors='ignore'))
+            title_ids_by_title_bytes[title_bytes] = title_id
+        yield "{} {}".format(timestamp_bytes.decode("ascii"), title_id)
+
+def read_titled_line_sequence_from_file(file_path, title_table):
+    return list(iterate_titled_line_sequence_from_file(file_path, title_table))
+
 def main_for_files(file1, file2, should_print_whole_table, very_short_print=False):
-    line_sequence1 = read_line_sequence_from_file(file1)
-    line_sequence2 = read_line_sequence_from_file(file1)
+    line_sequence1 = iterate_reduced_line_sequence_from_file(file1)
+    line_sequence2 = iterate_reduced_line_sequence_from_file(file1)
     name1 = os.path.basename(file1) if file1 else None
     name2 = os.path.basename(file2) if file2 else None
     return main_for_line_sequences(line_sequence1, line_sequence2, name1, name2, should_print_whole_table,
                                    very_short_print=very_short_print)
 
-def read_line_sequence_from_files(files):
-    # TODO: add sorting of files
-    separator = []
-    line_sequence = []
+def plan_input_files(files):
+    # Returns the groups of the input files sorted by their first timestamps (only the beginning and the end of each file
+    # are read, see peek_first_last_timestamps_of_file): the files of a group have overlapping time ranges
+    # and their lines should be merged by timestamps (see merge_line_sequences), the groups follow each other.
+    # The files that are passed several times, the copies of other files and the files without timestamps are dropped.
+    file_infos = []
+    file_ids = set()
     for file1 in files:
-        cur_line_sequence = read_line_sequence_from_file(file1)
-        line_sequence += separator + cur_line_sequence
+        stat = os.stat(file1)
+        if (stat.st_dev, stat.st_ino) in file_ids:
+            print(f"WARNING: the file '{file1}' is passed several times -- use it once")
+            continue
+        file_ids.add((stat.st_dev, stat.st_ino))
+        (first_timestamp, last_timestamp) = peek_first_last_timestamps_of_file(file1)
+        if first_timestamp is None:
+            print(f"WARNING: the file '{file1}' has no timestamps -- skip it")
+            continue
+        file_infos.append((first_timestamp, last_timestamp, stat.st_size, file1))
+    file_infos.sort()
+
+    file_groups = []
+    group_infos = []
+    for file_info in file_infos:
+        (first_timestamp, last_timestamp, size, file1) = file_info
+        if not group_infos or first_timestamp > max(x[1] for x in group_infos):
+            file_groups.append([file1])
+            group_infos = [file_info]
+            continue
+        copied_infos = [x for x in group_infos if x[:3] == file_info[:3] and filecmp.cmp(x[3], file1, shallow=False)]
+        if copied_infos:
+            print(f"WARNING: the file '{file1}' is a copy of the file '{copied_infos[0][3]}' -- skip it")
+            continue
+        print(f"WARNING: the time range of the file '{file1}' overlaps the time range of the file '{group_infos[-1][3]}' "
+              "-- merge them by timestamps")
+        file_groups[-1].append(file1)
+        group_infos.append(file_info)
+    return file_groups
+
+def iterate_timestamp_blocks(line_sequence):
+    # Yields the pairs (timestamp, lines): a line with timestamp and the lines without timestamps after it;
+    # the lines before the first timestamp are in the first block
+    timestamp = None
+    block = []
+    for line in line_sequence:
+        date_match = date_re.match(line)
+        if date_match:
+            if timestamp is not None:
+                yield (timestamp, block)
+                block = []
+            timestamp = date_match.group()
+        block.append(line)
+    if timestamp is not None:
+        yield (timestamp, block)
+
+def merge_line_sequences(line_sequences):
+    # k-way merge of the sorted line sequences by timestamps. A block (see iterate_timestamp_blocks) is dropped only
+    # if the same block with the same timestamp is already taken from another sequence (i.e. the files are copies);
+    # the blocks of the same timestamp from one sequence (e.g. several lines in a second in the event log mode) are kept.
+    # heapq.merge takes the equal timestamps from the sequences in their order, so the blocks of a sequence are not reordered.
+    def iterate_sources_and_blocks(source_index, line_sequence):
+        for (timestamp, block) in iterate_timestamp_blocks(line_sequence):
+            yield (timestamp, source_index, block)
+
+    blocks = heapq.merge(*[iterate_sources_and_blocks(x, y) for (x, y) in enumerate(line_sequences)], key=lambda x: x[0])
+    prev_timestamp = None
+    sources_by_blocks = {}
+    for (timestamp, source_index, block) in blocks:
+        if timestamp != prev_timestamp:
+            prev_timestamp = timestamp
+            sources_by_blocks = {}
+        block_key = tuple(block)
+        if sources_by_blocks.setdefault(block_key, source_index) != source_index:
+            continue
+        yield from block
+
+def iterate_line_sequence_of_file_groups(file_groups, get_line_sequence):
+    # Yields the lines of the groups of files from plan_input_files, the groups are separated by "rest"
+    separator = []
+    for file_group in file_groups:
+        yield from separator
+        if len(file_group) == 1:
+            yield from get_line_sequence(file_group[0])
+        else:
+            yield from merge_line_sequences([get_line_sequence(x) for x in file_group])
         separator = ["rest"]
-    return line_sequence
+
+def iterate_line_sequence_from_files(file_groups, title_table=None, from_date=None, to_date=None, boundary_files=()):
+    # Only the lines of the dates from from_date to to_date are read from boundary_files (see select_files_for_dates)
+    def get_line_sequence(file1):
+        if title_table is not None:
+            cur_line_sequence = iterate_titled_line_sequence_from_file(file1, title_table)
+        else:
+            cur_line_sequence = iterate_reduced_line_sequence_from_file(file1)
+        if file1 in boundary_files:
+            cur_line_sequence = iterate_line_sequence_of_dates(cur_line_sequence, from_date, to_date)
+        return cur_line_sequence
+    return iterate_line_sequence_of_file_groups(file_groups, get_line_sequence)
+
+def read_line_sequence_from_files(files, title_table=None):
+    return list(iterate_line_sequence_from_files(plan_input_files(files), title_table))
+
+class DayBeginDateDetector:
+    # Returns for a timestamp the date when its day began: a day lasts up to END_OF_DAY_TIME of the next date
+    def __init__(self):
+        self.timestamp_decoder = TimestampDecoder()
+        self.end_of_day_seconds = END_OF_DAY_TIME().hour * 3600 + END_OF_DAY_TIME().minute * 60 + END_OF_DAY_TIME().second
+        self.day_begin_dates_by_ordinals = {}
+
+    def get_day_begin_date(self, timestamp_str):
+        (cur_date_ordinal, cur_seconds) = self.timestamp_decoder.decode(timestamp_str)
+        if cur_seconds < self.end_of_day_seconds:
+            cur_date_ordinal -= 1
+        if cur_date_ordinal not in self.day_begin_dates_by_ordinals:
+            self.day_begin_dates_by_ordinals[cur_date_ordinal] = datetime.date.fromordinal(cur_date_ordinal).strftime("%Y-%m-%d")
+        return self.day_begin_dates_by_ordinals[cur_date_ordinal]
+
+    def get_current_day_begin_date(self):
+        return self.get_day_begin_date(time.strftime(TimestampDecoder.TIMESTAMP_FORMAT))
 
 def split_line_sequence_by_dates(line_sequence):
     cur_day_begin_date = None
     line_sequences_by_dates = {}
+    day_begin_date_detector = DayBeginDateDetector()
     for line in line_sequence:
         date_match = date_re.match(line)
         if not date_match:
@@ -747,38 +1379,800 @@ def split_line_sequence_by_dates(line_sequence):
             else:
                 print(f"WARNING: skipping the first line '{line}'")
             continue
-        cur_time_str = date_match.group()
-        cur_time = datetime.datetime.strptime(cur_time_str, "%Y-%m-%d_%H-%M-%S")
-        cur_date = cur_time.date()
-        if cur_time.time() < END_OF_DAY_TIME():
-            cur_date -= datetime.timedelta(days=1)
-        cur_day_begin_date = cur_date.strftime("%Y-%m-%d")
+        cur_day_begin_date = day_begin_date_detector.get_day_begin_date(date_match.group())
         line_sequences_by_dates.setdefault(cur_day_begin_date, []).append(line)
     return line_sequences_by_dates
 
+def get_dates_of_line_sequence(line_sequence):
+    # Returns the list of dates (in the order of appearance) that have timestamps in the line sequence
+    day_begin_date_detector = DayBeginDateDetector()
+    dates = {}
+    for line in line_sequence:
+        date_match = date_re.match(line)
+        if date_match:
+            dates[day_begin_date_detector.get_day_begin_date(date_match.group())] = True
+    return list(dates.keys())
+
+def iterate_line_sequence_of_dates(line_sequence, from_date, to_date):
+    # Yields the lines of the dates from from_date to to_date (None -- no limit); since the lines of a log are sorted,
+    # the line sequence is not read after the first timestamp of a later date
+    day_begin_date_detector = DayBeginDateDetector()
+    is_in_dates = False
+    for line in line_sequence:
+        date_match = date_re.match(line)
+        if date_match:
+            cur_date = day_begin_date_detector.get_day_begin_date(date_match.group())
+            if to_date and cur_date > to_date:
+                return
+            is_in_dates = not from_date or cur_date >= from_date
+        if is_in_dates:
+            yield line
+
+def peek_first_last_timestamps_in_buffer(buffer, chunk_size=65536):
+    # Returns the first and the last valid timestamps of the lines in the buffer (or None-s);
+    # only the beginning and the end of the buffer are read, if they contain timestamps
+    timestamp_decoder = TimestampDecoder()
+    def get_valid_timestamps(chunk):
+        for match in line_timestamp_bytes_re.finditer(chunk):
+            timestamp_str = match.group(1).decode("ascii")
+            try:
+                timestamp_decoder.decode(timestamp_str)
+            except ValueError:
+                continue
+            yield timestamp_str
+
+    first_timestamp = next(get_valid_timestamps(buffer[:chunk_size]), None) or next(get_valid_timestamps(buffer), None)
+    if first_timestamp is None:
+        return (None, None)
+    last_timestamp = None
+    tail_size = chunk_size
+    while last_timestamp is None:
+        # the chunk begins just after a newline, so its first match is a beginning of a line
+        tail_begin = max(0, len(buffer) - tail_size)
+        if tail_begin > 0:
+            tail_begin = buffer.find(b"\n", tail_begin) + 1 or len(buffer)
+        for last_timestamp in get_valid_timestamps(buffer[tail_begin:]):
+            pass
+        tail_size *= 2
+    return (first_timestamp, last_timestamp)
+
+def peek_first_last_timestamps_of_file(file_path):
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return (None, None)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return peek_first_last_timestamps_in_buffer(mm)
+
+def is_date_in_range(cur_date, from_date, to_date):
+    return (not from_date or cur_date >= from_date) and (not to_date or cur_date <= to_date)
+
+def select_files_for_dates(files, from_date, to_date):
+    # Returns the files that may have lines of the dates from from_date to to_date, and the set of the boundary files
+    # among them, i.e. the files that have also lines of other dates.
+    # A log winlog_YYYY-MM-DD has lines of the dates from YYYY-MM-DD minus one day (before END_OF_DAY_TIME),
+    # so the logs with far dates in their names are skipped without opening; for the other files
+    # only the first and the last timestamps are read.
+    one_day = datetime.timedelta(days=1)
+    min_name_date = (datetime.date.fromisoformat(from_date) - one_day).isoformat() if from_date else None
+    max_name_date = (datetime.date.fromisoformat(to_date) + one_day).isoformat() if to_date else None
+    day_begin_date_detector = DayBeginDateDetector()
+    selected_files = []
+    boundary_files = set()
+    for file1 in files:
+        name_date_match = log_name_date_re.match(os.path.basename(file1))
+        if name_date_match and not is_date_in_range(name_date_match.group(1), min_name_date, max_name_date):
+            continue
+        (first_timestamp, last_timestamp) = peek_first_last_timestamps_of_file(file1)
+        if first_timestamp is None:
+            continue
+        first_date = day_begin_date_detector.get_day_begin_date(first_timestamp)
+        last_date = day_begin_date_detector.get_day_begin_date(last_timestamp)
+        if (to_date and first_date > to_date) or (from_date and last_date < from_date):
+            continue
+        selected_files.append(file1)
+        if not is_date_in_range(first_date, from_date, to_date) or not is_date_in_range(last_date, from_date, to_date):
+            boundary_files.add(file1)
+    return (selected_files, boundary_files)
+
+class DateResultCache:
+    # On-disk cache of the results of parsing for the dates handled by main_for_file_list.
+    #
+    # * The files index keeps for each input file its size, mtime, content hash and the dates of its timestamps,
+    #   so the files with unchanged size and mtime are neither hashed nor read again.
+    # * The result for a date (its data, time info and the messages printed while parsing) is kept in a separate
+    #   zlib-compressed pickle file. The name of the file is the hash of the date, the content hashes of all the
+    #   files that have timestamps of the date, and the target time of the date.
+    # * The mtime of a result file is updated on each hit, and the result files with the oldest mtime are removed
+    #   when the total size of them exceeds the limit (i.e. LRU eviction).
+    #
+    # The result for the current day is never stored, since its log is still being written.
+    VERSION = 1
+    FILES_INDEX_NAME = "files_index.pickle"
+    RESULT_SUFFIX = ".result.zlib"
+
+    def __init__(self, folder, max_size_in_bytes):
+        self.folder = folder
+        self.max_size_in_bytes = max_size_in_bytes
+        os.makedirs(self.folder, exist_ok=True)
+        self.files_index = self._load_files_index()
+
+    def _files_index_path(self):
+        return os.path.join(self.folder, DateResultCache.FILES_INDEX_NAME)
+
+    def _result_path(self, key):
+        return os.path.join(self.folder, key + DateResultCache.RESULT_SUFFIX)
+
+    def _load_files_index(self):
+        try:
+            with open(self._files_index_path(), "rb") as f:
+                files_index = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return {}
+        if not isinstance(files_index, dict) or files_index.get("version") != DateResultCache.VERSION:
+            return {}
+        return files_index["files"]
+
+    def save_files_index(self):
+        tmp_path = self._files_index_path() + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": DateResultCache.VERSION, "files": self.files_index}, f)
+        os.replace(tmp_path, self._files_index_path())
+
+    def get_file_info(self, file_path):
+        # Returns the info on the file if the file is not changed since it was put to the index, otherwise None
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        file_info = self.files_index.get(file_path)
+        if file_info and file_info["size"] == stat.st_size and file_info["mtime_ns"] == stat.st_mtime_ns:
+            return file_info
+        return None
+
+    def read_file(self, file_path):
+        # Reads the file, puts the info on it to the index, and returns the info and the line sequence of the file
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        with open(file_path, "rb") as f:
+            content = f.read()
+        line_sequence = list(iterate_reduced_line_sequence_from_buffer(content))
+        file_info = {"size": stat.st_size,
+                     "mtime_ns": stat.st_mtime_ns,
+                     "content_hash": hashlib.sha1(content).hexdigest(),
+                     "dates": get_dates_of_line_sequence(line_sequence)}
+        self.files_index[file_path] = file_info
+        return (file_info, line_sequence)
+
+    @staticmethod
+    def get_result_key(cur_date, content_hashes, target_time_in_hours):
+        key_str = repr((DateResultCache.VERSION, cur_date, list(content_hashes), target_time_in_hours))
+        return hashlib.sha1(key_str.encode("utf8")).hexdigest()
+
+    def load_result(self, key):
+        result_path = self._result_path(key)
+        try:
+            with open(result_path, "rb") as f:
+                packed = pickle.loads(zlib.decompress(f.read()))
+            os.utime(result_path)
+        except (OSError, EOFError, zlib.error, pickle.UnpicklingError):
+            return None
+        return {"data": Data.from_packed(packed["data"]),
+                "time_info": packed["time_info"],
+                "parsing_messages": packed["parsing_messages"]}
+
+    def store_result(self, key, date_result):
+        packed = {"data": date_result["data"].to_packed(),
+                  "time_info": date_result["time_info"],
+                  "parsing_messages": date_result["parsing_messages"]}
+        result_path = self._result_path(key)
+        tmp_path = result_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(pickle.dumps(packed)))
+        os.replace(tmp_path, result_path)
+
+    def evict(self):
+        result_paths = [os.path.join(self.folder, x) for x in os.listdir(self.folder) if x.endswith(DateResultCache.RESULT_SUFFIX)]
+        stats = {x: os.stat(x) for x in result_paths}
+        total_size = sum(x.st_size for x in stats.values())
+        for result_path in sorted(result_paths, key=lambda x: stats[x].st_mtime_ns):
+            if total_size <= self.max_size_in_bytes:
+                break
+            os.remove(result_path)
+            total_size -= stats[result_path].st_size
+
+def read_line_sequences_by_dates_using_cache(file_groups, cache, target_time_table):
+    # Returns the list of dates of the files, the cached results for some of the dates, the line sequences
+    # for the other dates, and the cache keys for the results that should be stored.
+    # Only the files that are changed and the files with the dates of changed files are read.
+    # file_groups are from plan_input_files
+    files = list(itertools.chain.from_iterable(file_groups))
+    file_infos = {}
+    line_sequences_by_files = {}
+    for file1 in files:
+        file_info = cache.get_file_info(file1)
+        if file_info is None:
+            (file_info, line_sequences_by_files[file1]) = cache.read_file(file1)
+        file_infos[file1] = file_info
+
+    files_by_dates = {}
+    for file1 in files:
+        for cur_date in file_infos[file1]["dates"]:
+            files_by_dates.setdefault(cur_date, []).append(file1)
+    dates = list(files_by_dates.keys())
+
+    current_day_begin_date = DayBeginDateDetector().get_current_day_begin_date()
+    date_results = {}
+    keys_by_dates = {}
+    for cur_date in dates:
+        if cur_date >= current_day_begin_date:
+            continue
+        content_hashes = [file_infos[x]["content_hash"] for x in files_by_dates[cur_date]]
+        key = DateResultCache.get_result_key(cur_date, content_hashes, get_target_time_in_hours(cur_date, target_time_table))
+        date_result = cache.load_result(key)
+        if date_result is not None:
+            date_results[cur_date] = date_result
+        else:
+            keys_by_dates[cur_date] = key
+
+    line_sequences_by_dates = read_line_sequences_for_missed_dates(file_groups, files_by_dates, dates, date_results, line_sequences_by_files)
+    return (dates, date_results, line_sequences_by_dates, keys_by_dates)
+
+def read_line_sequences_for_missed_dates(file_groups, files_by_dates, dates, date_results, line_sequences_by_files):
+    # Reads only the files with timestamps of the dates that have no results, and returns the line sequences for these dates;
+    # file_groups are from plan_input_files, line_sequences_by_files may contain the already read line sequences of some files
+    missed_dates = [x for x in dates if x not in date_results]
+    files_to_read = set(itertools.chain.from_iterable(files_by_dates[x] for x in missed_dates))
+    file_groups = [[x for x in file_group if x in files_to_read] for file_group in file_groups]
+    def get_line_sequence(file1):
+        cur_line_sequence = line_sequences_by_files.get(file1)
+        if cur_line_sequence is None:
+            cur_line_sequence = iterate_reduced_line_sequence_from_file(file1)
+        return cur_line_sequence
+    all_line_sequences_by_dates = split_line_sequence_by_dates(
+            iterate_line_sequence_of_file_groups([x for x in file_groups if x], get_line_sequence))
+    return {x: all_line_sequences_by_dates[x] for x in missed_dates}
+
+class TimelineSidecar:
+    # Compact binary file "<log file>.tl" (e.g. winlog_2021-04-30.tl) with the parsed timelines of a log file,
+    # one timeline for each date of the file, so reports may load them instead of parsing the text of the log.
+    #
+    # All the numbers are little-endian; times are stored as (date ordinal * SECONDS_IN_DAY + seconds since midnight).
+    # * header: magic, version, size and mtime_ns of the log file, number of titles, number of dates
+    # * title table: for each title -- its length in bytes and its utf8 bytes
+    # * for each date: the date "YYYY-MM-DD", first and last time, number of time items, number of special time segments,
+    #   length of the messages printed while parsing; then the messages, the states (uint8 per item),
+    #   the segment ids and the title ids (int32 per item), and the special time segments
+    #
+    # The sidecar is used only if the size and mtime of the log file are the same as stored in it.
+    MAGIC = b"WLTL"
+    VERSION = 1
+    SUFFIX = ".tl"
+    HEADER = struct.Struct("<4sHqqII")
+    TITLE_HEADER = struct.Struct("<I")
+    DATE_HEADER = struct.Struct("<10sqqIII")
+    SEGMENT = struct.Struct("<qqiii")
+
+    @staticmethod
+    def path_for(file_path):
+        return file_path + TimelineSidecar.SUFFIX
+
+    @staticmethod
+    def _pack_time(cur_time):
+        (date_ordinal, seconds) = TimestampDecoder.from_datetime(cur_time)
+        return date_ordinal * SECONDS_IN_DAY() + seconds
+
+    @staticmethod
+    def _unpack_time(packed_time):
+        return TimestampDecoder.to_datetime(packed_time // SECONDS_IN_DAY(), packed_time % SECONDS_IN_DAY())
+
+    @staticmethod
+    def write(file_path):
+        # Parses the log file with window titles and writes the sidecar for it, returns the path of the sidecar
+        stat = os.stat(file_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            title_table = TitleTable()
+            line_sequences_by_dates = split_line_sequence_by_dates(read_titled_line_sequence_from_file(file_path, title_table))
+        date_results = {cur_date: calculate_date_result(cur_date, line_sequence, title_table)
+                        for cur_date, line_sequence in line_sequences_by_dates.items()}
+
+        chunks = [TimelineSidecar.HEADER.pack(TimelineSidecar.MAGIC, TimelineSidecar.VERSION, stat.st_size, stat.st_mtime_ns,
+                                              len(title_table), len(date_results))]
+        for title in title_table.titles:
+            title_bytes = title.encode("utf8")
+            chunks += [TimelineSidecar.TITLE_HEADER.pack(len(title_bytes)), title_bytes]
+        for cur_date, date_result in date_results.items():
+            data = date_result["data"]
+            messages_bytes = date_result["parsing_messages"].encode("utf8")
+            chunks.append(TimelineSidecar.DATE_HEADER.pack(cur_date.encode("ascii"),
+                                                           TimelineSidecar._pack_time(data.first_time),
+                                                           TimelineSidecar._pack_time(data.last_time),
+                                                           len(data), len(data.special_time_segments), len(messages_bytes)))
+            chunks += [messages_bytes, data.states.tobytes(), data.segment_ids.tobytes(), data.title_ids.tobytes()]
+            for segment in data.special_time_segments:
+                chunks.append(TimelineSidecar.SEGMENT.pack(TimelineSidecar._pack_time(segment.first_time),
+                                                           TimelineSidecar._pack_time(segment.last_time),
+                                                           segment.num_items_total, segment.num_items_rest, segment.num_items_work))
+
+        sidecar_path = TimelineSidecar.path_for(file_path)
+        tmp_path = sidecar_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(chunks))
+        os.replace(tmp_path, sidecar_path)
+        return sidecar_path
+
+    @staticmethod
+    def _is_header_up_to_date(buffer, stat):
+        if len(buffer) < TimelineSidecar.HEADER.size:
+            return False
+        (magic, version, size, mtime_ns, _, _) = TimelineSidecar.HEADER.unpack_from(buffer, 0)
+        return (magic == TimelineSidecar.MAGIC and version == TimelineSidecar.VERSION
+                and size == stat.st_size and mtime_ns == stat.st_mtime_ns)
+
+    @staticmethod
+    def is_up_to_date(file_path):
+        # Only the header of the sidecar is read
+        try:
+            stat = os.stat(file_path)
+            with open(TimelineSidecar.path_for(file_path), "rb") as f:
+                header_bytes = f.read(TimelineSidecar.HEADER.size)
+        except OSError:
+            return False
+        return TimelineSidecar._is_header_up_to_date(header_bytes, stat)
+
+    @staticmethod
+    def load(file_path):
+        # Returns the dict {date: date result} from the sidecar of the log file,
+        # or None if there is no sidecar or it is outdated
+        try:
+            stat = os.stat(file_path)
+            with open(TimelineSidecar.path_for(file_path), "rb") as f:
+                buffer = f.read()
+        except OSError:
+            return None
+        if not TimelineSidecar._is_header_up_to_date(buffer, stat):
+            return None
+        (_, _, _, _, num_titles, num_dates) = TimelineSidecar.HEADER.unpack_from(buffer, 0)
+        offset = TimelineSidecar.HEADER.size
+
+        titles = []
+        for _ in range(num_titles):
+            (title_len,) = TimelineSidecar.TITLE_HEADER.unpack_from(buffer, offset)
+            offset += TimelineSidecar.TITLE_HEADER.size
+            titles.append(buffer[offset:offset + title_len].decode("utf8"))
+            offset += title_len
+        title_table = TitleTable(titles)
+
+        date_results = {}
+        for _ in range(num_dates):
+            (date_bytes, first_time, last_time, num_items, num_segments, messages_len) = TimelineSidecar.DATE_HEADER.unpack_from(buffer, offset)
+            offset += TimelineSidecar.DATE_HEADER.size
+            parsing_messages = buffer[offset:offset + messages_len].decode("utf8")
+            offset += messages_len
+
+            data = Data(TimelineSidecar._unpack_time(first_time), TimelineSidecar._unpack_time(first_time))
+            data.last_time = TimelineSidecar._unpack_time(last_time)
+            data.states = np.frombuffer(buffer, dtype=np.uint8, count=num_items, offset=offset).copy()
+            offset += num_items
+            data.segment_ids = np.frombuffer(buffer, dtype=np.int32, count=num_items, offset=offset).copy()
+            offset += 4 * num_items
+            data.title_ids = np.frombuffer(buffer, dtype=np.int32, count=num_items, offset=offset).copy()
+            offset += 4 * num_items
+            data.title_table = title_table
+            for _ in range(num_segments):
+                (segment_first_time, segment_last_time, num_items_total, num_items_rest, num_items_work) = TimelineSidecar.SEGMENT.unpack_from(buffer, offset)
+                offset += TimelineSidecar.SEGMENT.size
+                data.special_time_segments.append(SpecialTimeSegment.from_packed({
+                    "first_time": TimelineSidecar._unpack_time(segment_first_time),
+                    "last_time": TimelineSidecar._unpack_time(segment_last_time),
+                    "num_items_total": num_items_total,
+                    "num_items_rest": num_items_rest,
+                    "num_items_work": num_items_work}))
+
+            cur_date = date_bytes.decode("ascii")
+            date_results[cur_date] = {"data": data,
+                                      "time_info": calculate_time_info(data),
+                                      "parsing_messages": parsing_messages}
+        return date_results
+
+def read_line_sequences_by_dates_using_sidecars(file_groups):
+    # Returns the list of dates of the files, the results from the sidecars for the dates that have timestamps
+    # in one file only, and the line sequences for the other dates (they are parsed from the text of the files);
+    # file_groups are from plan_input_files
+    files = list(itertools.chain.from_iterable(file_groups))
+    sidecar_results_by_files = {}
+    line_sequences_by_files = {}
+    files_by_dates = {}
+    for file1 in files:
+        sidecar_results = TimelineSidecar.load(file1)
+        if sidecar_results is not None:
+            sidecar_results_by_files[file1] = sidecar_results
+            cur_dates = list(sidecar_results.keys())
+        else:
+            line_sequences_by_files[file1] = read_reduced_line_sequence_from_file(file1)
+            cur_dates = get_dates_of_line_sequence(line_sequences_by_files[file1])
+        for cur_date in cur_dates:
+            files_by_dates.setdefault(cur_date, []).append(file1)
+    dates = list(files_by_dates.keys())
+
+    date_results = {}
+    for cur_date in dates:
+        cur_files = files_by_dates[cur_date]
+        if len(cur_files) == 1 and cur_files[0] in sidecar_results_by_files:
+            date_results[cur_date] = sidecar_results_by_files[cur_files[0]][cur_date]
+
+    line_sequences_by_dates = read_line_sequences_for_missed_dates(file_groups, files_by_dates, dates, date_results, line_sequences_by_files)
+    return (dates, date_results, line_sequences_by_dates)
+
+def read_lock_intervals(folder, cur_date):
+    # Returns the list of pairs (lock time, unlock time) from the lock event files of the date and the neighbour dates;
+    # if there is no unlock event after the last lock event, the unlock time is None.
+    # The "Unknown" event of the start of the daemon closes the interval that is open, so a lock event whose unlock event
+    # was lost (the daemon was stopped or the machine was rebooted while locked) is not paired with a later unlock event
+    cur_date_ordinal = datetime.datetime.strptime(cur_date, "%Y-%m-%d").toordinal()
+    timestamp_decoder = TimestampDecoder()
+    events = []
+    for date_ordinal in range(cur_date_ordinal - 1, cur_date_ordinal + 2):
+        path = LogFileHandling.lock_events_path(folder, datetime.date.fromordinal(date_ordinal).strftime("%Y-%m-%d"))
+        if not os.path.isfile(path):
+            continue
+        for line in read_line_sequence_from_file(path):
+            lock_event_match = lock_event_re.match(line)
+            if not lock_event_match:
+                continue
+            try:
+                event_time = timestamp_decoder.decode_to_datetime(lock_event_match.group(1))
+            except ValueError:
+                continue
+            events.append((event_time, lock_event_match.group(2)))
+    # the events of the same time are kept in the order of the files
+    events.sort(key=lambda x: x[0])
+
+    lock_intervals = []
+    lock_time = None
+    for (event_time, event_name) in events:
+        if event_name == "Locked" and lock_time is None:
+            lock_time = event_time
+        elif event_name != "Locked" and lock_time is not None:
+            lock_intervals.append((lock_time, event_time))
+            lock_time = None
+    if lock_time is not None:
+        lock_intervals.append((lock_time, None))
+    return lock_intervals
+
+def apply_lock_intervals(data, lock_intervals):
+    # The time items in the intervals when the screen was locked become must_be_rest, except the items of work
+    # from the log (must_be_work) and the special time segments, since their rest is already known from "rest N min"
+    step = DEFAULT_TIME_STEP_IN_SECONDS()
+    can_be_changed = ((data.segment_ids == Data.NO_SEGMENT) & (data.states != State.must_be_work))
+    for (lock_time, unlock_time) in lock_intervals:
+        begin_index = max(0, math.ceil((lock_time - data.first_time).total_seconds() / step))
+        end_index = len(data) if unlock_time is None else math.ceil((unlock_time - data.first_time).total_seconds() / step)
+        end_index = min(end_index, len(data))
+        if begin_index >= end_index:
+            continue
+        indexes = begin_index + np.flatnonzero(can_be_changed[begin_index:end_index])
+        data.states[indexes] = State.must_be_rest
+
+def apply_lock_intervals_to_date_result(date_result, lock_intervals):
+    # Returns the new date result, the passed one is not changed (e.g. it may be stored in the cache)
+    data = Data.from_packed(date_result["data"].to_packed())
+    apply_lock_intervals(data, lock_intervals)
+    return {"data": data,
+            "time_info": calculate_time_info(data),
+            "parsing_messages": date_result["parsing_messages"]}
+
+def calculate_date_result(cur_date, line_sequence, title_table=None):
+    # The messages printed while parsing are kept to be printed in the report later
+    with contextlib.redirect_stdout(io.StringIO()) as f:
+        (data1, _, data_merged) = parse_line_sequences(line_sequence, None, cur_date, None, title_table=title_table)
+    return {"data": data1,
+            "time_info": calculate_time_info(data_merged),
+            "parsing_messages": f.getvalue()}
+
+class AppTimeIndex:
+    # The index of the time in applications for a range of dates: for each window title (the window class and title
+    # as they are in the log) and each date -- the sorted numbers of the time items with this title from the beginning
+    # of the day (END_OF_DAY_TIME), so the items of the same date from several files (or from copies of a file)
+    # are counted once.
+    # The filters are regexes that are matched against the distinct titles only, the results are cached,
+    # so the time for any set of filters is counted without parsing the logs again.
+    def __init__(self):
+        self.dates = []
+        self.items_by_titles = {}
+        self.matches_by_patterns = {}
+
+    def add_data(self, cur_date, data):
+        if data.title_ids is None:
+            return
+        if cur_date not in self.dates:
+            self.dates.append(cur_date)
+        day_begin_time = datetime.datetime.combine(datetime.date.fromisoformat(cur_date), END_OF_DAY_TIME())
+        first_item = round((data.first_time - day_begin_time).total_seconds() / DEFAULT_TIME_STEP_IN_SECONDS())
+
+        indexes = np.flatnonzero(data.title_ids != Data.NO_TITLE)
+        title_ids = data.title_ids[indexes]
+        order = np.argsort(title_ids, kind="stable")
+        (indexes, title_ids) = (indexes[order], title_ids[order])
+        (unique_title_ids, begins) = np.unique(title_ids, return_index=True)
+        for (title_id, items) in zip(unique_title_ids.tolist(), np.split(indexes + first_item, begins[1:])):
+            items_by_dates = self.items_by_titles.setdefault(data.title_table.titles[title_id], {})
+            prev_items = items_by_dates.get(cur_date)
+            items_by_dates[cur_date] = items if prev_items is None else np.union1d(prev_items, items)
+
+    def is_title_matched(self, title, pattern):
+        matches = self.matches_by_patterns.setdefault(pattern, {})
+        if title not in matches:
+            matches[title] = bool(re.search(pattern, title))
+        return matches[title]
+
+    def get_matched_titles(self, patterns, exclude_patterns=()):
+        # The titles that match any of the patterns and do not match any of exclude_patterns
+        return [title for title in self.items_by_titles
+                if any(self.is_title_matched(title, x) for x in patterns)
+                and not any(self.is_title_matched(title, x) for x in exclude_patterns)]
+
+    def count_items(self, patterns, exclude_patterns=(), cur_date=None):
+        num_items = 0
+        for title in self.get_matched_titles(patterns, exclude_patterns):
+            for (items_date, items) in self.items_by_titles[title].items():
+                if cur_date is None or items_date == cur_date:
+                    num_items += len(items)
+        return num_items
+
+    def get_time(self, patterns, exclude_patterns=(), cur_date=None):
+        return self.count_items(patterns, exclude_patterns, cur_date) * DEFAULT_TIME_STEP_AS_TIMEDELTA()
+
+def read_app_time_index(files, should_use_sidecars=False):
+    # Each file is parsed once with the window titles (or its sidecar is loaded) and added to the index
+    app_time_index = AppTimeIndex()
+    for file1 in files:
+        date_results = TimelineSidecar.load(file1) if should_use_sidecars else None
+        if date_results is None:
+            title_table = TitleTable()
+            line_sequences_by_dates = split_line_sequence_by_dates(read_titled_line_sequence_from_file(file1, title_table))
+            date_results = {cur_date: calculate_date_result(cur_date, line_sequence, title_table)
+                            for (cur_date, line_sequence) in line_sequences_by_dates.items()}
+        for (cur_date, date_result) in date_results.items():
+            app_time_index.add_data(cur_date, date_result["data"])
+    app_time_index.dates.sort()
+    return app_time_index
+
+def str_app_time(td):
+    num_minutes = int(td.total_seconds()) // 60
+    return "{} min = {} h {} min".format(num_minutes, num_minutes // 60, num_minutes % 60)
+
+def main_for_app_times(files, apps, app_exclusions=(), should_use_sidecars=False):
+    # apps is the list of pairs (name of app, regex of its titles), app_exclusions -- the same for the excluded titles
+    app_time_index = read_app_time_index(files, should_use_sidecars)
+    names = list(dict.fromkeys(name for (name, _) in apps))
+    patterns_by_names = {name: [x for (y, x) in apps if y == name] for name in names}
+    exclude_patterns_by_names = {name: [x for (y, x) in app_exclusions if y == name] for name in names}
+
+    for cur_date in app_time_index.dates:
+        print(cur_date + ":", ", ".join("{} = {}".format(name, str_timedelta(
+                    app_time_index.get_time(patterns_by_names[name], exclude_patterns_by_names[name], cur_date)))
+                for name in names))
+    for name in names:
+        td = app_time_index.get_time(patterns_by_names[name], exclude_patterns_by_names[name])
+        print("Total time in {} = {}".format(name, str_app_time(td)))
+
+def main_for_date_result(cur_date, date_result, should_print_whole_table, very_short_print=False,
+                         target_time_table=None, lock_intervals=None):
+    if lock_intervals:
+        date_result = apply_lock_intervals_to_date_result(date_result, lock_intervals)
+    print_report_header(cur_date, None)
+    print(date_result["parsing_messages"], end="")
+    data = date_result["data"]
+    return print_report(data, None, data, date_result["time_info"], cur_date, None, should_print_whole_table,
+                        very_short_print=very_short_print,
+                        target_time_table=target_time_table)
+
+class LogFollower:
+    # Keeps the parsed data of a log that is being written, and on each update reads and parses only the bytes
+    # appended to the log since the previous update, so the time info is updated in O(number of new lines).
+    # If the file becomes shorter than the read part (e.g. it is replaced), it is parsed from the beginning.
+    # If the file does not exist yet (e.g. the logger has not written the first line of the day), there are no new lines.
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.clean()
+
+    def clean(self):
+        self.offset = 0
+        self.incomplete_line_bytes = b""
+        self.lines_before_first_time = []
+        self.reader = None
+        self.time_info = empty_time_info()
+
+    def read_new_lines(self):
+        try:
+            if os.path.getsize(self.file_path) < self.offset:
+                print(f"WARNING: the file '{self.file_path}' became shorter, parse it from the beginning")
+                self.clean()
+            with open(self.file_path, "rb") as f:
+                f.seek(self.offset)
+                new_bytes = f.read()
+        except FileNotFoundError:
+            return []
+        self.offset += len(new_bytes)
+
+        # the last line may be incomplete, it is kept up to the next update
+        new_bytes = self.incomplete_line_bytes + new_bytes
+        end_of_complete_lines = new_bytes.rfind(b"\n") + 1
+        self.incomplete_line_bytes = new_bytes[end_of_complete_lines:]
+        return list(iterate_reduced_line_sequence_from_buffer(new_bytes[:end_of_complete_lines]))
+
+    def update(self):
+        new_lines = self.read_new_lines()
+        if self.reader is None:
+            (first_time, line_sequence) = peek_first_time_in_line_sequence(self.lines_before_first_time + new_lines)
+            if first_time is None:
+                self.lines_before_first_time = line_sequence
+                return
+            self.lines_before_first_time = []
+            first_time = FirstLastTimeDetector.round_sec_in_datetime(first_time, should_floor = True)
+            self.reader = Reader(None, os.path.basename(self.file_path), first_time, is_remote=False)
+            self.reader.start()
+            new_lines = line_sequence
+
+        prev_index = self.reader.prev_filled_index
+        num_segments = len(self.reader.data.special_time_segments)
+        self.reader.feed(new_lines)
+        if self.reader.prev_filled_index is None:
+            return
+
+        # only the items after the previous filled index are changed by the new lines
+        begin_index = 0 if prev_index is None else prev_index + 1
+        new_time_info = calculate_time_info(self.reader.data, begin_index, self.reader.prev_filled_index + 1, num_segments)
+        self.time_info = add_time_infos(self.time_info, new_time_info)
+
+def main_for_follow(file_path, follow_interval_in_seconds, target_time_table_path=None):
+    # If file_path is None, the current log is followed, and the next day's log is followed after the date changes
+    target_time_table = load_target_time_table(target_time_table_path)
+    should_follow_current_log = file_path is None
+    log_follower = None
+    try:
+        while True:
+            if should_follow_current_log:
+                file_path = LogFileHandling.current_worklog_path(None)
+            if log_follower is None or log_follower.file_path != file_path:
+                target_time_in_hours = get_target_time_in_hours(os.path.basename(file_path), target_time_table)
+                print(f"Following {file_path}, target_time_in_hours={target_time_in_hours}")
+                log_follower = LogFollower(file_path)
+            log_follower.update()
+            time_info = log_follower.time_info
+            time_to_should_work_for_target = calc_time_to_should_work_for_target(time_info, target_time_in_hours)
+            ideal_time_of_target = datetime.datetime.now() + time_to_should_work_for_target
+            print("{}: total work = {}, total rest = {}, TIME_TO_SHOULD_WORK_FOR_TARGET = {}, IDEAL_TIME_OF_TARGET = {}".format(
+                    time.strftime("%H:%M:%S"),
+                    str_timedelta(int(time_info["num_work_items"]) * DEFAULT_TIME_STEP_AS_TIMEDELTA()),
+                    str_timedelta(int(time_info["num_rest_items"]) * DEFAULT_TIME_STEP_AS_TIMEDELTA()),
+                    str_timedelta(time_to_should_work_for_target, num_colons=2),
+                    ideal_time_of_target.strftime("%H:%M:%S")),
+                  flush=True)
+            time.sleep(follow_interval_in_seconds)
+    except KeyboardInterrupt:
+        pass
+
+def _main_for_date_in_worker(task):
+    # Is run in a worker process, the printed text is returned to be printed by the main process in the order of dates
+    (cur_date, line_sequence, date_result, should_print_whole_table, very_short_print, target_time_table, lock_intervals) = task
+    if date_result is None:
+        date_result = calculate_date_result(cur_date, line_sequence)
+    with contextlib.redirect_stdout(io.StringIO()) as f:
+        dt = main_for_date_result(cur_date, date_result, should_print_whole_table,
+                                  very_short_print=very_short_print,
+                                  target_time_table=target_time_table,
+                                  lock_intervals=lock_intervals)
+    return (f.getvalue(), dt, date_result)
 
 def main_for_file_list(files1, should_print_whole_table, very_short_print=False,
-                       target_time_table_path=None):
-    if target_time_table_path:
-        with open(target_time_table_path) as f:
-            target_time_table = yaml.safe_load(f)
+                       target_time_table_path=None, num_jobs=1,
+                       cache_folder=None, cache_max_size_in_mb=None, should_use_sidecars=False,
+                       lock_events_folder=None, from_date=None, to_date=None):
+    # If from_date or to_date is set, only the files that have lines of these dates are read, see select_files_for_dates
+    target_time_table = load_target_time_table(target_time_table_path)
+
+    if from_date or to_date:
+        (files1, boundary_files) = select_files_for_dates(files1, from_date, to_date)
     else:
-        target_time_table = None
-
-    line_sequence = read_line_sequence_from_files(files1)
-    line_sequences_by_dates = split_line_sequence_by_dates(line_sequence)
+        boundary_files = set()
+    # the files are sorted by their first timestamps, the duplicated files are dropped and the overlapping ones are merged
+    file_groups = plan_input_files(files1)
+
+    if cache_folder:
+        cache = DateResultCache(cache_folder, int(cache_max_size_in_mb * 1024 * 1024))
+        (dates, date_results, line_sequences_by_dates, keys_by_dates) = read_line_sequences_by_dates_using_cache(file_groups, cache, target_time_table)
+    elif should_use_sidecars:
+        cache = None
+        (dates, date_results, line_sequences_by_dates) = read_line_sequences_by_dates_using_sidecars(file_groups)
+        keys_by_dates = {}
+    else:
+        cache = None
+        line_sequence = iterate_line_sequence_from_files(file_groups, from_date=from_date, to_date=to_date,
+                                                         boundary_files=boundary_files)
+        line_sequences_by_dates = split_line_sequence_by_dates(line_sequence)
+        dates = list(line_sequences_by_dates.keys())
+        date_results = {}
+        keys_by_dates = {}
+
+    if from_date or to_date:
+        # the boundary files may have other dates, when they are handled by the cache or the sidecars
+        dates = [x for x in dates if is_date_in_range(x, from_date, to_date)]
+        keys_by_dates = {x: y for (x, y) in keys_by_dates.items() if is_date_in_range(x, from_date, to_date)}
+
+    if lock_events_folder:
+        lock_intervals_by_dates = {x: read_lock_intervals(lock_events_folder, x) for x in dates}
+    else:
+        lock_intervals_by_dates = {}
 
     summary_dt = datetime.timedelta()
-    for cur_date, line_sequence in line_sequences_by_dates.items():
-        dt = main_for_line_sequences(line_sequence, None, cur_date, None, should_print_whole_table,
-                                     very_short_print=very_short_print,
-                                     target_time_table=target_time_table)
-        summary_dt += dt
+    calculated_date_results = {}
+    if num_jobs == 1 or len(dates) <= 1:
+        for cur_date in dates:
+            date_result = date_results.get(cur_date)
+            if date_result is None:
+                date_result = calculate_date_result(cur_date, line_sequences_by_dates[cur_date])
+                calculated_date_results[cur_date] = date_result
+            dt = main_for_date_result(cur_date, date_result, should_print_whole_table,
+                                      very_short_print=very_short_print,
+                                      target_time_table=target_time_table,
+                                      lock_intervals=lock_intervals_by_dates.get(cur_date))
+            summary_dt += dt
+    else:
+        tasks = [(cur_date, line_sequences_by_dates.get(cur_date), date_results.get(cur_date),
+                  should_print_whole_table, very_short_print, target_time_table, lock_intervals_by_dates.get(cur_date))
+                 for cur_date in dates]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=num_jobs) as executor:
+            # map returns the results in the order of the tasks, i.e. in the order of dates
+            for (cur_date, (printed_text, dt, date_result)) in zip(dates, executor.map(_main_for_date_in_worker, tasks)):
+                print(printed_text, end="")
+                summary_dt += dt
+                if cur_date not in date_results:
+                    calculated_date_results[cur_date] = date_result
+
+    if cache:
+        for cur_date, key in keys_by_dates.items():
+            cache.store_result(key, calculated_date_results[cur_date])
+        cache.evict()
+        cache.save_files_index()
 
     print("SUM OF TIME_TO_SHOULD_WORK_FOR_TARGET-s =", str_timedelta(summary_dt, num_colons=2))
     print("SUM OF TIME_TO_SHOULD_WORK_FOR_TARGET-s in DAYS = {:.3}".format(summary_dt / datetime.timedelta(hours = DEFAULT_TARGET_TIME_IN_HOURS())))
 
 
+def get_machine_name_of_remote_file(file_path):
+    # winlog_YYYY-MM-DD.remote -> "remote", winlog_YYYY-MM-DD.remote.<machine> -> "<machine>"
+    name = os.path.basename(file_path)
+    suffix = name[name.rindex(".remote") + len(".remote"):]
+    return suffix[1:] if suffix.startswith(".") else "remote"
+
+def find_remote_files(file_path):
+    # The remote files of the log are copied by _synchronize_winlogs.sh as winlog_YYYY-MM-DD.remote,
+    # the logs of other machines may be kept as winlog_YYYY-MM-DD.remote.<machine>;
+    # the sidecars of the remote files (winlog_YYYY-MM-DD.remote.tl, see TimelineSidecar) and the temporary files
+    # written with them are not logs, so the machines may not be named "tl" or "tmp"
+    remote_files = sorted(glob.glob(glob.escape(file_path) + ".remote")) + sorted(glob.glob(glob.escape(file_path) + ".remote.*"))
+    return [x for x in remote_files if not x.endswith((TimelineSidecar.SUFFIX, ".tmp"))]
+
+def main_for_machines(file1, remote_files, should_print_whole_table, very_short_print=False, target_time_table_path=None):
+    target_time_table = load_target_time_table(target_time_table_path)
+
+    machine_names = ["local"] + [get_machine_name_of_remote_file(x) for x in remote_files]
+    name1 = os.path.basename(file1)
+    name2 = ", ".join(os.path.basename(x) for x in remote_files)
+    print_report_header(name1, name2)
+    (data1, remote_data_list, data_merged, work_sources) = parse_line_sequences_of_machines(
+            iterate_reduced_line_sequence_from_file(file1),
+            [iterate_reduced_line_sequence_from_file(x) for x in remote_files],
+            machine_names)
+    if data_merged is None:
+        print("No data")
+        return datetime.timedelta(0)
+    time_info = calculate_time_info(data_merged)
+    return print_report(data1, None, data_merged, time_info, name1, name2, should_print_whole_table,
+                        very_short_print=very_short_print,
+                        target_time_table=target_time_table,
+                        remote_data_by_machines=dict(zip(machine_names[1:], remote_data_list)),
+                        work_sources=work_sources)
+
 def main_for_one_date_suffix(date_suffix, should_print_whole_table):
     file1 = LogFileHandling.current_worklog_path(date_suffix)
     file2 = LogFileHandling.current_worklog_path_from_remote(date_suffix)
@@ -808,6 +2202,12 @@ def extract_date_suffixes_from_inputs(inputs):
         date_suffixes.append(date_suffix)
     return date_suffixes
 
+def positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"should be a positive integer: {text}")
+    return value
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--should_print_whole_table", action="store_true", help="If should print the whole table")
@@ -819,8 +2219,69 @@ def main():
     parser.add_argument("--target-time-table", nargs='?', const='/home/lbeynens/worklog/time_table.yml',
                         help="The path to the time table -- a YAML file with dict of target time-s in format {<date>: <time in hours>}, "
                               "(e.g. {'2021-04-30':5.5, '2021-05-01': 0})")
+    parser.add_argument("--jobs", type=positive_int, nargs='?', const=os.cpu_count(), default=1,
+                        help="The number of worker processes that handle the dates of the input files in parallel "
+                             "(without the value -- the number of CPUs)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Use the on-disk cache of the results for the dates of the input files (see --cache-dir); "
+                             "the past dates of unchanged files are not parsed again")
+    parser.add_argument("--cache-dir", default=LogFileHandling.DEFAULT_CACHE_FOLDER(),
+                        help="The folder of the on-disk cache for --cache")
+    parser.add_argument("--cache-max-size-mb", type=float, default=100.0,
+                        help="The maximal total size of the cached results, the least recently used ones are removed")
+    parser.add_argument("--write-sidecars", action="store_true",
+                        help="Parse each input file and write the binary sidecar file '<input file>.tl' with its timelines "
+                             "and window titles (if the sidecar is outdated or absent), then exit")
+    parser.add_argument("--use-sidecars", action="store_true",
+                        help="Load the timelines of the dates from the sidecar files '<input file>.tl' instead of parsing "
+                             "the input files, if the sidecars are up to date")
+    parser.add_argument("--lock-events", action="store_true",
+                        help="Read the lock event files 'lockevents_YYYY-MM-DD' written by daemon_is_screen_locked.py "
+                             "(see --lock-events-dir); the time when the screen was locked is counted as definitely rest")
+    parser.add_argument("--lock-events-dir", default=LogFileHandling.DEFAULT_FOLDER_WITH_LOGS(),
+                        help="The folder with the lock event files for --lock-events")
+    parser.add_argument("--merge-machines", action="store_true",
+                        help="For each input file merge the logs of all the machines: the input file is local, and "
+                             "the files '<input file>.remote' and '<input file>.remote.<machine>' are remote; "
+                             "the machine that supplied each work interval is printed")
+    parser.add_argument("--follow", action="store_true",
+                        help="Follow the log that is being written and print the updated time to target when new lines "
+                             "are appended; the only input file is followed as one file, without input files the current log "
+                             "is followed and the next day's log is taken when the date changes")
+    parser.add_argument("--follow-interval", type=float, default=15.0,
+                        help="The interval between the updates in --follow mode, in seconds")
+    parser.add_argument("--from", dest="from_date", type=lambda x: datetime.date.fromisoformat(x).isoformat(),
+                        help="Report only the dates from this one (YYYY-MM-DD, the date when the day began); only the input files "
+                             "that may have lines of the dates are read, by their names 'winlog_YYYY-MM-DD' and their "
+                             "first and last timestamps. Without input files all the logs in the folder with logs are used")
+    parser.add_argument("--to", dest="to_date", type=lambda x: datetime.date.fromisoformat(x).isoformat(),
+                        help="Report only the dates up to this one (YYYY-MM-DD), see --from; "
+                             "--from and --to are for the report only, not for the other modes")
+    parser.add_argument("--app", nargs=2, action="append", metavar=("NAME", "REGEX"),
+                        help="Instead of the report print the time in the application NAME for each date of the input files "
+                             "and the total time, the application is the window titles (with the window class) that match REGEX; "
+                             "may be repeated, also for the same NAME")
+    parser.add_argument("--app-exclude", nargs=2, action="append", default=[], metavar=("NAME", "REGEX"),
+                        help="The window titles that match REGEX are not counted for the application NAME")
     parser.add_argument("inputs", nargs="*", help="Input files or date suffixes")
     args = parser.parse_args()
+    if args.cache and args.use_sidecars:
+        parser.error("--cache and --use-sidecars may not be used together")
+    if args.cache and os.path.exists(args.cache_dir) and not os.path.isdir(args.cache_dir):
+        parser.error(f"--cache-dir is not a folder: {args.cache_dir}")
+    if args.lock_events and not os.path.isdir(args.lock_events_dir):
+        parser.error(f"--lock-events-dir is not a folder: {args.lock_events_dir}")
+    if args.follow and len(args.inputs) > 1:
+        parser.error("--follow may be used with one input file only")
+    if args.from_date or args.to_date:
+        # only the report for the list of files selects the dates, the other modes would ignore the range
+        other_modes = [x for (x, y) in (("--should_use_date_suffix", args.should_use_date_suffix),
+                                        ("--write-sidecars", args.write_sidecars),
+                                        ("--app", args.app),
+                                        ("--merge-machines", args.merge_machines),
+                                        ("--follow", args.follow)) if y]
+        if other_modes:
+            parser.error("--from and --to may not be used with {}".format(", ".join(other_modes)))
 
     should_print_whole_table = args.should_print_whole_table
     if args.should_use_date_suffix:
@@ -829,11 +2290,40 @@ def main():
         return
 
     inputs = args.inputs
+    if not inputs and (args.from_date or args.to_date):
+        # the local logs only, without the remote copies and the sidecars
+        inputs = sorted(glob.glob(os.path.join(LogFileHandling.DEFAULT_FOLDER_WITH_LOGS(), "winlog_*")))
+        inputs = [x for x in inputs if log_name_date_re.match(os.path.basename(x)) and "." not in os.path.basename(x)]
     if not inputs:
         inputs = [LogFileHandling.current_worklog_path(None)]
 
+    if args.write_sidecars:
+        for file1 in inputs:
+            if not TimelineSidecar.is_up_to_date(file1):
+                print("Wrote", TimelineSidecar.write(file1))
+        return
+
+    if args.app:
+        main_for_app_times(inputs, args.app, args.app_exclude, should_use_sidecars=args.use_sidecars)
+        return
+
+    if args.merge_machines:
+        for file1 in inputs:
+            main_for_machines(file1, find_remote_files(file1), should_print_whole_table, very_short_print=args.short,
+                              target_time_table_path=args.target_time_table)
+        return
+
+    if args.follow:
+        main_for_follow(args.inputs[0] if args.inputs else None, args.follow_interval,
+                        target_time_table_path=args.target_time_table)
+        return
+
     main_for_file_list(inputs, should_print_whole_table, very_short_print=args.short,
-                       target_time_table_path=args.target_time_table)
+                       target_time_table_path=args.target_time_table, num_jobs=args.jobs,
+                       cache_folder=(args.cache_dir if args.cache else None), cache_max_size_in_mb=args.cache_max_size_mb,
+                       should_use_sidecars=args.use_sidecars,
+                       lock_events_folder=(args.lock_events_dir if args.lock_events else None),
+                       from_date=args.from_date, to_date=args.to_date)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# Micro-benchmark of TimestampDecoder from __wingettotalresttime4.py against datetime.strptime.
+# Before timing, the results of the decoder are checked against strptime, see check_timestamp_decoder.py.
+
+import argparse
+import datetime
+import timeit
+
+from __wingettotalresttime4 import TimestampDecoder
+from check_timestamp_decoder import check_decoder, generate_timestamps
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-timestamps", type=int, default=100000, help="The number of generated timestamps")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    timestamps = generate_timestamps(args.num_timestamps, args.seed)
+
+    num_errors = check_decoder(timestamps)
+    if num_errors:
+        print(f"Check against strptime failed: {num_errors} errors")
+        return 1
+    print("Check against strptime passed")
+
+    timestamp_decoder = TimestampDecoder()
+    time_strptime = timeit.timeit(lambda: [datetime.datetime.strptime(x, TimestampDecoder.TIMESTAMP_FORMAT) for x in timestamps], number=1)
+    time_decoder = timeit.timeit(lambda: [timestamp_decoder.decode(x) for x in timestamps], number=1)
+    print(f"strptime:         {time_strptime:.3f} sec = {len(timestamps) / time_strptime:.0f} timestamps/sec")
+    print(f"TimestampDecoder: {time_decoder:.3f} sec = {len(timestamps) / time_decoder:.0f} timestamps/sec")
+    print(f"speedup = {time_strptime / time_decoder:.1f}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# Benchmark of the stages of __wingettotalresttime4.py on synthetic winlogs (see generate_synthetic_winlogs.py):
+# reading, Reader.parse, merge_data, calculate_time_info and the printers are timed separately.
+# The stages are the same as in the report: the files are read by the memory-mapped reduced reader
+# (read_reduced_line_sequence_from_file) and parsed as in parse_line_sequences.
+# For each stage the throughput in input lines per second and the peak of the memory allocated in the stage are reported,
+# also the peak RSS of the process is reported.
+# The results are appended to a json-lines file with the git revision, so the revisions may be compared with --compare.
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from __wingettotalresttime4 import (FirstLastTimeDetector, Reader, calculate_time_info, merge_data,
+                                    peek_first_time_in_line_sequence, print_data_as_list, print_data_as_table,
+                                    read_reduced_line_sequence_from_file)
+from generate_synthetic_winlogs import generate_winlogs
+
+STAGES = ["read", "parse", "merge", "time_info", "print_list", "print_table"]
+
+def get_git_revision():
+    try:
+        folder = os.path.dirname(os.path.abspath(__file__))
+        revision = subprocess.check_output(["git", "describe", "--always", "--dirty"], cwd=folder, stderr=subprocess.DEVNULL)
+        return revision.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def get_peak_rss_in_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_stages(file_pairs, stage_callback):
+    # Runs all the stages for all the pairs (local file, remote file or None);
+    # stage_callback(stage_name, func) should run func() and return its result
+    for (local_path, remote_path) in file_pairs:
+        # the report reads the lines lazily while parsing, here they are read into lists to time reading separately
+        def read():
+            line_sequence1 = read_reduced_line_sequence_from_file(local_path)
+            line_sequence2 = read_reduced_line_sequence_from_file(remote_path) if remote_path else []
+            return (line_sequence1, line_sequence2)
+        (line_sequence1, line_sequence2) = stage_callback("read", read)
+
+        # the same as parse_line_sequences without merge_data
+        def parse():
+            (first_time1, _) = peek_first_time_in_line_sequence(line_sequence1)
+            (first_time2, _) = peek_first_time_in_line_sequence(line_sequence2)
+            first_time = FirstLastTimeDetector.round_sec_in_datetime(min(x for x in (first_time1, first_time2) if x),
+                                                                    should_floor = True)
+            data1 = Reader(line_sequence1, local_path, first_time, is_remote=False).parse()
+            data2 = Reader(line_sequence2, remote_path, first_time, is_remote=True).parse() if first_time2 else None
+            parsed_data = [x for x in (data1, data2) if x is not None]
+            last_time = FirstLastTimeDetector.round_sec_in_datetime(max(x.last_time for x in parsed_data), should_floor = False)
+            for x in parsed_data:
+                x.set_last_time(last_time)
+            return (data1, data2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            (data1, data2) = stage_callback("parse", parse)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            data_merged = stage_callback("merge", lambda: merge_data(data1, data2))
+        stage_callback("time_info", lambda: calculate_time_info(data_merged))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            def print_list():
+                print_data_as_list(data1)
+                print_data_as_list(data2)
+                print_data_as_list(data_merged)
+                print_data_as_list(data_merged, True)
+            stage_callback("print_list", print_list)
+            stage_callback("print_table", lambda: print_data_as_table(data1, data2, data_merged))
+
+def measure_times(file_pairs):
+    times_by_stages = {x: 0.0 for x in STAGES}
+    def stage_callback(stage_name, func):
+        begin = time.perf_counter()
+        result = func()
+        times_by_stages[stage_name] += time.perf_counter() - begin
+        return result
+    run_stages(file_pairs, stage_callback)
+    return times_by_stages
+
+def measure_memory_peaks(file_pairs):
+    # A separate run, since tracemalloc slows down the code
+    peaks_by_stages = {x: 0 for x in STAGES}
+    def stage_callback(stage_name, func):
+        tracemalloc.start()
+        try:
+            result = func()
+            (_, peak) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peaks_by_stages[stage_name] = max(peaks_by_stages[stage_name], peak)
+        return result
+    run_stages(file_pairs, stage_callback)
+    return {x: y / (1024 * 1024) for x, y in peaks_by_stages.items()}
+
+def count_lines(file_pairs):
+    num_lines = 0
+    for file_pair in file_pairs:
+        for file_path in file_pair:
+            if file_path:
+                num_lines += len(read_reduced_line_sequence_from_file(file_path))
+    return num_lines
+
+def print_results(results):
+    print("revision {}, {} days, tick {} sec, remote={}, {} lines".format(results["revision"], results["days"], results["tick"],
+                                                                        results["remote"], results["num_lines"]))
+    print("{:<16} {:>10} {:>14} {:>14}".format("stage", "time, sec", "lines/sec", "peak alloc, MB"))
+    for stage_name in STAGES:
+        stage = results["stages"][stage_name]
+        print("{:<16} {:>10.3f} {:>14.0f} {:>14.1f}".format(stage_name, stage["time"], stage["lines_per_second"], stage["peak_alloc_mb"]))
+    print("peak RSS = {:.1f} MB".format(results["peak_rss_mb"]))
+
+def print_comparison(prev_results, results):
+    print("comparison with revision {} from {}:".format(prev_results["revision"], prev_results["date"]))
+    for stage_name in STAGES:
+        prev_stage = prev_results["stages"].get(stage_name)
+        if not prev_stage:
+            continue
+        ratio = results["stages"][stage_name]["lines_per_second"] / prev_stage["lines_per_second"]
+        print("{:<16} x{:.2f}".format(stage_name, ratio))
+
+def load_previous_results(results_path, results):
+    # Returns the last saved results with the same parameters of the benchmark
+    if not os.path.exists(results_path):
+        return None
+    prev_results = None
+    with open(results_path) as f:
+        for line in f:
+            saved = json.loads(line)
+            if all(saved.get(x) == results[x] for x in ("days", "tick", "remote", "seed", "num_lines")):
+                prev_results = saved
+    return prev_results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=7, help="The number of generated days, e.g. 1, 7 or 365")
+    parser.add_argument("--tick", type=int, default=15, choices=[10, 15], help="The step of the timestamps in seconds")
+    parser.add_argument("--remote", action="store_true", help="Generate and parse also the remote files")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="The best time of this number of runs is reported")
+    parser.add_argument("--folder", help="Use this folder for the generated files and keep them (by default a temporary folder is used)")
+    parser.add_argument("--results", default="benchmark_wingettotalresttime4_results.jsonl",
+                        help="The json-lines file to append the results to")
+    parser.add_argument("--compare", action="store_true", help="Compare with the last saved results with the same parameters")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        folder = args.folder or tmp_folder
+        (local_paths, remote_paths) = generate_winlogs(folder, datetime.date(2021, 1, 4), args.days, args.tick, args.remote, args.seed)
+        file_pairs = list(zip(local_paths, remote_paths or [None] * len(local_paths)))
+        num_lines = count_lines(file_pairs)
+
+        all_times = [measure_times(file_pairs) for _ in range(args.repeat)]
+        peaks_by_stages = measure_memory_peaks(file_pairs)
+
+    results = {"revision": get_git_revision(),
+               "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+               "python": sys.version.split()[0],
+               "days": args.days,
+               "tick": args.tick,
+               "remote": args.remote,
+               "seed": args.seed,
+               "num_lines": num_lines,
+               "peak_rss_mb": get_peak_rss_in_mb(),
+               "stages": {}}
+    for stage_name in STAGES:
+        best_time = min(x[stage_name] for x in all_times)
+        results["stages"][stage_name] = {"time": best_time,
+                                         "lines_per_second": num_lines / best_time if best_time else float("inf"),
+                                         "peak_alloc_mb": peaks_by_stages[stage_name]}
+    print_results(results)
+
+    if args.compare:
+        prev_results = load_previous_results(args.results, results)
+        if prev_results:
+            print_comparison(prev_results, results)
+        else:
+            print("No saved results with the same parameters to compare with")
+
+    with open(args.results, "a") as f:
+        f.write(json.dumps(results) + "\n")
+    print("Results are appended to", args.results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# Check of TimestampDecoder from __wingettotalresttime4.py against datetime.strptime on generated valid
+# and malformed timestamps: the results (or the errors) should be the same.
+# Exits with a non-zero code if there is a mismatch; it is also called by benchmark_timestamp_decoder.py before timing.
+
+import argparse
+import datetime
+import random
+import sys
+
+from __wingettotalresttime4 import TimestampDecoder
+
+def generate_timestamps(num_timestamps, seed):
+    rnd = random.Random(seed)
+    first_time = datetime.datetime(2021, 4, 30, 6, 0, 0)
+    timestamps = []
+    cur_time = first_time
+    for _ in range(num_timestamps):
+        cur_time += datetime.timedelta(seconds = rnd.choice([10, 15, 15, 16, 600]))
+        timestamps.append(cur_time.strftime(TimestampDecoder.TIMESTAMP_FORMAT))
+    return timestamps
+
+def generate_malformed_timestamps():
+    return ["2021-04-30_13-05-60", "2021-04-30_24-00-00", "2021-02-30_00-00-00", "0000-01-01_00-00-00",
+            "2021-04-30_1-05-45", "2021-4-30_13-05-45", "2021-04-30_13-05-4", "2021-04-30_13-05-455",
+            "2021_04-30_13-05-45", "2021-04-30-13-05-45", "20_1-04-30_13-05-45", "--------------------",
+            "2021-04-30_13-05-45_", "2021-04-30", "-", "_", "1"]
+
+def decode_with_strptime(timestamp_str):
+    try:
+        return datetime.datetime.strptime(timestamp_str, TimestampDecoder.TIMESTAMP_FORMAT)
+    except ValueError:
+        return ValueError
+
+def decode_with_decoder(timestamp_decoder, timestamp_str):
+    try:
+        return timestamp_decoder.decode_to_datetime(timestamp_str)
+    except ValueError:
+        return ValueError
+
+def check_decoder(timestamps):
+    timestamp_decoder = TimestampDecoder()
+    num_errors = 0
+    for timestamp_str in timestamps + generate_malformed_timestamps():
+        expected = decode_with_strptime(timestamp_str)
+        result = decode_with_decoder(timestamp_decoder, timestamp_str)
+        if result != expected:
+            print(f"ERROR: for '{timestamp_str}' strptime gives {expected} whereas TimestampDecoder gives {result}")
+            num_errors += 1
+    return num_errors
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-timestamps", type=int, default=100000, help="The number of generated timestamps")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    num_errors = check_decoder(generate_timestamps(args.num_timestamps, args.seed))
+    if num_errors:
+        print(f"Check against strptime failed: {num_errors} errors")
+        return 1
+    print("Check against strptime passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
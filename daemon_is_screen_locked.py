@@ -1,51 +1,98 @@
 #!/usr/bin/env python3.8
 import os, sys, time
+import selectors
 
-import daemon
 import subprocess
 
-log_file = os.path.abspath(sys.argv[1])
-with open(log_file, 'w') as f:
-    f.write("")
+from instance_lock import InstanceLock
+import lock_state
 
-with daemon.DaemonContext():
-    cmd = subprocess.Popen(["dbus-monitor --session \"type='signal',interface='org.gnome.ScreenSaver'\""],
-            shell=True, stdout=subprocess.PIPE)
+DBUS_MONITOR_CMD = ["dbus-monitor", "--session", "type='signal',interface='org.gnome.ScreenSaver'"]
 
-    prepare = False
-    should_write = False
-    log_string = ""
-    while True:
-        time.sleep(0.1)
-#        with open(log_file, 'a') as f:
-#            f.write("========\n")
-        try:
-            line = cmd.stdout.readline()
-            line = line.decode("utf-8")
-            print(line)
+class ScreenSaverSignalParser:
+    # Parses the output of dbus-monitor line by line:
+    # the signal ActiveChanged is followed by the line with its argument "boolean true" or "boolean false"
+    def __init__(self):
+        self.prepare = False
+
+    def feed(self, line):
+        # Returns True if the screen is locked, False if it is unlocked, or None if the line does not change the state
+        if "path=/org/gnome/ScreenSaver; interface=org.gnome.ScreenSaver; member=ActiveChanged" in line:
+            self.prepare = True
+            return None
 
-            if "path=/org/gnome/ScreenSaver; interface=org.gnome.ScreenSaver; member=ActiveChanged" in line:
-                prepare = True
-                print(" - set prepare")
+        is_locked = None
+        if self.prepare and "boolean true" in line:
+            is_locked = True
+        elif self.prepare and "boolean false" in line:
+            is_locked = False
+        self.prepare = False
+        return is_locked
+
+def listen_lines(fd, on_line):
+    # Calls on_line for each line read from fd as soon as it is available, returns at EOF
+    selector = selectors.DefaultSelector()
+    selector.register(fd, selectors.EVENT_READ)
+    os.set_blocking(fd, False)
+    pending = b""
+    try:
+        while True:
+            selector.select()
+            try:
+                chunk = os.read(fd, 65536)
+            except BlockingIOError:
                 continue
+            if not chunk:
+                break
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                on_line(line.decode("utf-8", errors="ignore"))
+        if pending:
+            on_line(pending.decode("utf-8", errors="ignore"))
+    finally:
+        selector.close()
 
-            if prepare and "boolean true" in line:
-                log_string = "Locked\n"
-                should_write = True
-            elif prepare and "boolean false" in line:
-                log_string = "Unlocked\n"
-                should_write = True
-            else:
-                should_write = False
-            prepare = False
-
-            if should_write:
-                with open(log_file, 'w') as f:
-                    f.write(log_string)
-                print(f" - wrote {log_string}")
+def listen_screen_saver(log_file, publisher):
+    # dbus-monitor is restarted if it exits, e.g. when the session bus is restarted
+    while True:
+        parser = ScreenSaverSignalParser()
+        def on_line(line):
+            is_locked = parser.feed(line)
+            if is_locked is not None:
+                publisher.publish(lock_state.LOCKED if is_locked else lock_state.UNLOCKED)
 
+        cmd = subprocess.Popen(DBUS_MONITOR_CMD, stdout=subprocess.PIPE)
+        try:
+            listen_lines(cmd.stdout.fileno(), on_line)
         except Exception:
             import traceback
             with open(log_file+".err", 'a') as f:
                 traceback.print_exc(None, f);
+        finally:
+            cmd.kill()
+            cmd.wait()
+        time.sleep(1)
+
+def main():
+    # python-daemon is imported here, so the module may be imported without it (e.g. by the tests)
+    import daemon
+
+    log_file = os.path.abspath(sys.argv[1])
+    # the lock is checked before the daemonizing to report it, but it is taken in the daemon process only,
+    # since DaemonContext closes the open files
+    instance_lock = InstanceLock(log_file + ".lock")
+    if instance_lock.is_held():
+        print(f"The daemon is already run, pid={instance_lock.get_owner_pid()}")
+        sys.exit(1)
+
+    with daemon.DaemonContext():
+        if not instance_lock.acquire():
+            sys.exit(1)
+        # the state is published atomically, see lock_state.py
+        publisher = lock_state.LockStatePublisher(log_file)
+        publisher.publish(lock_state.UNKNOWN)
+        listen_screen_saver(log_file, publisher)
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# Generates synthetic winlog_YYYY-MM-DD files (and optionally the remote files winlog_YYYY-MM-DD.remote)
+# that look like the files written by the loggers: lines with timestamps every 10 or 15 seconds,
+# and the blocks of "rest N min", "rest ????" and bare "rest" lines around the gaps of the timestamps.
+
+import argparse
+import datetime
+import os
+import random
+
+LOCAL_TITLES = ["gnome-terminal.Gnome-terminal\tleonid@leonid-pc: ~/work",
+                "firefox.Firefox\tNews",
+                "code.Code\t__wingettotalresttime4.py - package",
+                "Mail.Thunderbird\tInbox"]
+
+REMOTE_TITLES = ["OUTLOOK.EXE\tInbox - Outlook",
+                 "Teams.exe\tMeeting | Microsoft Teams",
+                 "chrome.exe\tJira - Google Chrome"]
+
+def generate_day_lines(day, tick_in_seconds, rnd, titles, computer_name=None, rest_probability=0.01):
+    # Returns the lines of one day of work: from about 8:00 to about 16:00-23:00, with rests of 2-90 minutes
+    cur_time = datetime.datetime.combine(day, datetime.time(8 + rnd.randint(0, 1), rnd.randint(0, 59), rnd.randint(0, 59)))
+    end_time = cur_time + datetime.timedelta(hours=rnd.uniform(8, 14))
+    lines = []
+    while cur_time < end_time:
+        if rnd.random() < rest_probability:
+            gap_in_minutes = rnd.randint(2, 90)
+            kind = rnd.choice(["min", "min_without_comment", "question", "bare"])
+            if kind == "min":
+                lines += ["", "rest {} min on coffee".format(rnd.randint(1, gap_in_minutes)), ""]
+            elif kind == "min_without_comment":
+                lines += ["rest {} min".format(gap_in_minutes)]
+            elif kind == "question":
+                lines += ["", "rest ????????", ""]
+            else:
+                lines += ["rest"]
+            cur_time += datetime.timedelta(minutes=gap_in_minutes, seconds=rnd.randint(0, 59))
+        else:
+            cur_time += datetime.timedelta(seconds=tick_in_seconds + rnd.choice([0, 0, 0, 1]))
+        idle_time = rnd.random() * 5
+        title = rnd.choice(titles)
+        if computer_name is None:
+            lines.append("{}\t{:<100}\t{:f} sec".format(cur_time.strftime("%Y-%m-%d_%H-%M-%S"), title, idle_time))
+        else:
+            lines.append("{}\t{}\t{:<100}\t{:f} sec".format(cur_time.strftime("%Y-%m-%d_%H-%M-%S"), computer_name, title, idle_time))
+    return lines
+
+def generate_winlogs(folder, first_date, num_days, tick_in_seconds=15, should_generate_remote=False, seed=0):
+    # Writes the files to the folder, returns the list of the paths of the local files and the list of the remote files
+    rnd = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    local_paths = []
+    remote_paths = []
+    for day_index in range(num_days):
+        day = first_date + datetime.timedelta(days=day_index)
+        local_path = os.path.join(folder, "winlog_" + day.strftime("%Y-%m-%d"))
+        with open(local_path, "w") as f:
+            f.write("\n".join(generate_day_lines(day, tick_in_seconds, rnd, LOCAL_TITLES)) + "\n")
+        local_paths.append(local_path)
+        if should_generate_remote:
+            remote_path = local_path + ".remote"
+            with open(remote_path, "w") as f:
+                f.write("\n".join(generate_day_lines(day, tick_in_seconds, rnd, REMOTE_TITLES, computer_name="WORKPC")) + "\n")
+            remote_paths.append(remote_path)
+    return (local_paths, remote_paths)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", help="The folder for the generated files")
+    parser.add_argument("--first-date", default="2021-01-04", help="The date of the first file, YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=7, help="The number of days, e.g. 1, 7 or 365")
+    parser.add_argument("--tick", type=int, default=15, choices=[10, 15], help="The step of the timestamps in seconds")
+    parser.add_argument("--remote", action="store_true", help="Generate also the remote files winlog_YYYY-MM-DD.remote")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    first_date = datetime.datetime.strptime(args.first_date, "%Y-%m-%d").date()
+    (local_paths, remote_paths) = generate_winlogs(args.folder, first_date, args.days, args.tick, args.remote, args.seed)
+    print("Generated {} local and {} remote files in {}".format(len(local_paths), len(remote_paths), args.folder))
+
+if __name__ == "__main__":
+    main()
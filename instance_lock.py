@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# Single-instance lock for the loggers and daemons: the lock file (e.g. ~/worklog/windows_logger3.lock)
+# is locked exclusively by the running instance and contains its PID.
+# The OS releases the lock when the process exits or is killed, so a lock file that is left by a dead process
+# is stale: it is not locked, and the next instance takes it over.
+#
+# Usage as a module:
+#     lock = InstanceLock(path)
+#     if not lock.acquire():
+#         print(f"Already run, pid={lock.get_owner_pid()}")
+#
+# Usage from shell scripts:
+#     instance_lock.py --check PATH          -- exit code 0 and the PID of the owner if the lock is held, 1 otherwise
+#     instance_lock.py --run PATH -- CMD...  -- take the lock and exec CMD keeping the lock (POSIX only)
+
+import argparse
+import os
+import sys
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+class InstanceLock:
+    # On Windows the locked region is far after the PID, since the locks are mandatory there
+    # and the locked bytes could not be read by the other processes
+    LOCK_OFFSET = 1 << 20
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def _try_lock(self, fd):
+        try:
+            if os.name == "nt":
+                os.lseek(fd, InstanceLock.LOCK_OFFSET, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock_and_close(self, fd):
+        # The lock is released by closing on POSIX, on Windows it should be unlocked explicitly
+        if os.name == "nt":
+            try:
+                os.lseek(fd, InstanceLock.LOCK_OFFSET, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            except OSError:
+                pass
+        os.close(fd)
+
+    def _read_pid(self, fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        content = os.read(fd, 32).decode("ascii", errors="ignore").strip()
+        return int(content) if content.isdigit() else None
+
+    def acquire(self):
+        # Returns True if the lock is taken by this process, False if it is held by another running instance
+        if self.fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not self._try_lock(fd):
+            os.close(fd)
+            return False
+        stale_pid = self._read_pid(fd)
+        if stale_pid is not None and stale_pid != os.getpid():
+            print(f"Found stale lock {self.path} of pid={stale_pid}, take it over")
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode("ascii"))
+        self.fd = fd
+        return True
+
+    def release(self):
+        if self.fd is None:
+            return
+        os.ftruncate(self.fd, 0)
+        self._unlock_and_close(self.fd)
+        self.fd = None
+
+    def get_owner_pid(self):
+        # Returns the PID of the running instance that holds the lock, or None if the lock is free or stale
+        if self.fd is not None:
+            return os.getpid()
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except FileNotFoundError:
+            return None
+        if self._try_lock(fd):
+            self._unlock_and_close(fd)
+            return None
+        pid = self._read_pid(fd)
+        os.close(fd)
+        return pid
+
+    def is_held(self):
+        if self.fd is not None:
+            return True
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except FileNotFoundError:
+            return False
+        if self._try_lock(fd):
+            self._unlock_and_close(fd)
+            return False
+        os.close(fd)
+        return True
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="Check if the lock is held by a running instance")
+    parser.add_argument("--run", action="store_true", help="Take the lock and exec the command keeping the lock")
+    parser.add_argument("path", help="The lock file")
+    parser.add_argument("cmd", nargs=argparse.REMAINDER, help="The command for --run (after --)")
+    args = parser.parse_args()
+
+    lock = InstanceLock(args.path)
+    if args.run:
+        cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+        assert cmd, "The command is not set"
+        if not lock.acquire():
+            print(f"Already run, pid={lock.get_owner_pid()}")
+            return 1
+        # the locked file descriptor is inherited by the command, so the command keeps the lock (and the same PID)
+        os.set_inheritable(lock.fd, True)
+        os.execvp(cmd[0], cmd)
+
+    if lock.is_held():
+        print(f"Running pid={lock.get_owner_pid()}")
+        return 0
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# Publishing of the screen lock state by daemon_is_screen_locked.py and reading of it by the loggers.
+#
+# The state is published in two ways:
+# * the text file (e.g. ~/worklog/IS_LOCKED) with "Locked" / "Unlocked", it is replaced atomically by rename,
+#   so the readers never see a truncated file
+# * the status word in the file "<text file>.state" that is memory-mapped by the publisher and the readers:
+#   a sequence counter, the state and the time of the change; the counter is odd while the publisher changes the word,
+#   so a reader retries if the counter is odd or has changed during the reading (seqlock).
+#   Reading is done from the mapped memory, without system calls.
+#
+# Also the history of the changes is appended to the per-day event files "lockevents_YYYY-MM-DD" in the same folder,
+# one line per change: "YYYY-MM-DD_HH-MM-SS\tLocked" or "YYYY-MM-DD_HH-MM-SS\tUnlocked";
+# when the daemon starts, "YYYY-MM-DD_HH-MM-SS\tUnknown" is appended, so a "Locked" whose "Unlocked" was lost
+# (the daemon was stopped or the machine was rebooted while the screen was locked) is not paired with a later "Unlocked".
+# __wingettotalresttime4.py --lock-events reads them to make the locked time must_be_rest.
+
+import mmap
+import os
+import struct
+import time
+
+UNKNOWN = 0
+UNLOCKED = 1
+LOCKED = 2
+
+STATUS_WORD = struct.Struct("<QId") # sequence counter, state, time of the change
+SEQUENCE = struct.Struct("<Q")
+# If the publisher died while changing the status word, the counter stays odd, so the readers stop retrying
+MAX_READ_ATTEMPTS = 5000
+
+def get_status_path(text_path):
+    return text_path + ".state"
+
+def get_lock_events_path(folder, cur_time):
+    return os.path.join(folder, time.strftime("lockevents_%Y-%m-%d", time.localtime(cur_time)))
+
+def append_lock_event(folder, state, cur_time=None):
+    if cur_time is None:
+        cur_time = time.time()
+    line = "{}\t{}\n".format(time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime(cur_time)),
+                              {LOCKED: "Locked", UNLOCKED: "Unlocked"}.get(state, "Unknown"))
+    with open(get_lock_events_path(folder, cur_time), 'a') as f:
+        f.write(line)
+
+class LockStatePublisher:
+    def __init__(self, text_path, should_append_events=True):
+        self.text_path = text_path
+        self.events_folder = os.path.dirname(os.path.abspath(text_path)) if should_append_events else None
+        status_path = get_status_path(text_path)
+        fd = os.open(status_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < STATUS_WORD.size:
+                os.ftruncate(fd, STATUS_WORD.size)
+            self.mm = mmap.mmap(fd, STATUS_WORD.size)
+        finally:
+            os.close(fd)
+        (self.sequence, _, _) = STATUS_WORD.unpack_from(self.mm, 0)
+        self.sequence += self.sequence % 2
+
+    def publish(self, state):
+        cur_time = time.time()
+        if self.events_folder:
+            append_lock_event(self.events_folder, state, cur_time)
+        self.sequence += 1
+        SEQUENCE.pack_into(self.mm, 0, self.sequence)
+        STATUS_WORD.pack_into(self.mm, 0, self.sequence, state, cur_time)
+        self.sequence += 1
+        SEQUENCE.pack_into(self.mm, 0, self.sequence)
+
+        text = {LOCKED: "Locked\n", UNLOCKED: "Unlocked\n"}.get(state, "")
+        tmp_path = self.text_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, self.text_path)
+
+    def close(self):
+        self.mm.close()
+
+class LockStateReader:
+    # The helper for the loggers: is_locked() may be called on every tick
+    def __init__(self, text_path):
+        self.status_path = get_status_path(text_path)
+        self.mm = None
+
+    def _map(self):
+        try:
+            fd = os.open(self.status_path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            if os.fstat(fd).st_size < STATUS_WORD.size:
+                return False
+            self.mm = mmap.mmap(fd, STATUS_WORD.size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        return True
+
+    def read(self):
+        # Returns the pair (state, time of the change)
+        if self.mm is None and not self._map():
+            return (UNKNOWN, None)
+        for _ in range(MAX_READ_ATTEMPTS):
+            (sequence1, state, changed_at) = STATUS_WORD.unpack_from(self.mm, 0)
+            (sequence2,) = SEQUENCE.unpack_from(self.mm, 0)
+            if (sequence1 % 2 == 0) and (sequence1 == sequence2):
+                return (state, changed_at if sequence1 else None)
+        return (UNKNOWN, None)
+
+    def is_locked(self):
+        return self.read()[0] == LOCKED
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# Writing of the log lines for windows_logger3.py:
+# * LogFileWriter keeps the log file open, rotates it by dates and reopens it if it is moved
+# * AsyncLogWriter writes the lines by LogFileWriter in a background thread
+# The module does not depend on wx and win32, so it may be used and tested on any OS.
+
+import os
+import queue
+import threading
+from time import time
+
+
+class LogFileWriter:
+    # Keeps the log file open instead of opening and closing it for each line:
+    # * each write is flushed to the OS at once, but fsync is called at most every FSYNC_INTERVAL seconds
+    # * the file is rotated when the date returned by get_cur_date changes, the name of the file is "winlog_" + date
+    # * if the file is moved or removed while it is open, it is reopened (i.e. created again) by its path;
+    #   this is checked at most every FSYNC_INTERVAL seconds (it costs two system calls) and when a write fails
+    def __init__(self, folder, get_cur_date, fsync_interval=60):
+        self.FOLDER = folder
+        self.FSYNC_INTERVAL = fsync_interval
+        self.get_cur_date = get_cur_date
+
+        self.f = None
+        self.cur_date = None
+        self.time_of_last_fsync = 0
+        self.time_of_last_move_check = 0
+
+    def GetPath(self, cur_date=None):
+        if cur_date is None:
+            cur_date = self.get_cur_date()
+        return os.path.join(self.FOLDER, "winlog_" + cur_date)
+
+    def DoesLogFileExist(self):
+        return os.path.isfile(self.GetPath())
+
+    def IsMoved(self):
+        # The open file is not the file at its path any more
+        try:
+            return not os.path.samestat(os.fstat(self.f.fileno()), os.stat(self.GetPath(self.cur_date)))
+        except OSError:
+            return True
+
+    def Open(self, cur_date):
+        self.Close()
+        self.cur_date = cur_date
+        self.f = open(self.GetPath(cur_date), 'a', encoding="utf8", errors='ignore')
+        self.time_of_last_fsync = time()
+        self.time_of_last_move_check = time()
+
+    def Write(self, log_line, cur_date=None):
+        # cur_date is the date of the line, by default it is the current date
+        if cur_date is None:
+            cur_date = self.get_cur_date()
+        if (self.f is None) or (cur_date != self.cur_date):
+            self.Open(cur_date)
+        elif time() - self.time_of_last_move_check >= self.FSYNC_INTERVAL:
+            self.time_of_last_move_check = time()
+            if self.IsMoved():
+                print(f"Log file {self.GetPath(cur_date)} was moved or removed, reopen it")
+                self.Open(cur_date)
+        try:
+            self.f.write(log_line)
+            self.f.flush()
+        except OSError:
+            print(f"Writing to log file {self.GetPath(cur_date)} failed, reopen it")
+            self.Open(cur_date)
+            self.f.write(log_line)
+            self.f.flush()
+        if time() - self.time_of_last_fsync >= self.FSYNC_INTERVAL:
+            self.Sync()
+
+    def Sync(self):
+        if self.f is None:
+            return
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.time_of_last_fsync = time()
+
+    def Close(self):
+        if self.f is None:
+            return
+        try:
+            self.Sync()
+        finally:
+            self.f.close()
+            self.f = None
+
+
+class AsyncLogWriter:
+    # Writes the lines by LogFileWriter in a background thread, so the file I/O does not stall the timer of the GUI.
+    # The lines are put into a bounded queue with their dates; if the queue is full, the line is dropped and counted.
+    # The thread writes all the lines that are in the queue at once (up to MAX_BATCH_SIZE lines).
+    def __init__(self, log_file_writer, max_queue_size=1000, max_batch_size=100):
+        self.log_file_writer = log_file_writer
+        self.MAX_BATCH_SIZE = max_batch_size
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.thread = threading.Thread(target=self.Run, name="AsyncLogWriter", daemon=True)
+
+        self.num_dropped_lines = 0
+        self.max_queue_depth = 0
+        self.num_write_errors = 0
+
+    def Start(self):
+        self.thread.start()
+
+    def QueueDepth(self):
+        return self.queue.qsize()
+
+    def Write(self, log_line):
+        try:
+            self.queue.put_nowait(("line", self.log_file_writer.get_cur_date(), log_line))
+        except queue.Full:
+            self.num_dropped_lines += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def Sync(self):
+        self.queue.put(("sync",))
+
+    def Stop(self, timeout=10):
+        # Writes the queued lines, closes the file and stops the thread
+        self.queue.put(("stop",))
+        self.thread.join(timeout)
+
+    def GetStats(self):
+        return f"queue depth {self.QueueDepth()} (max {self.max_queue_depth}), " \
+               f"dropped lines {self.num_dropped_lines}, write errors {self.num_write_errors}"
+
+    def Run(self):
+        is_stopped = False
+        while not is_stopped:
+            batch = [self.queue.get()]
+            while len(batch) < self.MAX_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # the consecutive lines of the same date are written at once
+            lines = []
+            lines_date = None
+            for item in batch + [("end",)]:
+                if lines and ((item[0] != "line") or (item[1] != lines_date)):
+                    self.WriteLines("".join(lines), lines_date)
+                    lines = []
+                if item[0] == "line":
+                    lines_date = item[1]
+                    lines.append(item[2])
+                elif item[0] == "sync":
+                    self.CallWriter(self.log_file_writer.Sync)
+                elif item[0] == "stop":
+                    is_stopped = True
+        self.CallWriter(self.log_file_writer.Close)
+
+    def WriteLines(self, text, cur_date):
+        self.CallWriter(self.log_file_writer.Write, text, cur_date)
+
+    def CallWriter(self, func, *args):
+        try:
+            func(*args)
+        except Exception:
+            import traceback
+            self.num_write_errors += 1
+            traceback.print_exc(None, None);
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# Tests of the parsing of the dbus-monitor output by daemon_is_screen_locked.py on a fake signal stream,
+# run by: python -m pytest test_daemon_is_screen_locked.py
+
+import os
+import threading
+
+from daemon_is_screen_locked import ScreenSaverSignalParser, listen_lines
+
+ACTIVE_CHANGED_LINE = ("signal time=1619771123.456 sender=:1.30 -> destination=(null destination) serial=1234 "
+                       "path=/org/gnome/ScreenSaver; interface=org.gnome.ScreenSaver; member=ActiveChanged\n")
+
+def get_active_changed_signal(is_active):
+    return ACTIVE_CHANGED_LINE + "   boolean {}\n".format("true" if is_active else "false")
+
+def listen_chunks(chunks):
+    # Writes the chunks into a pipe one by one, each chunk is read separately by listen_lines;
+    # returns the states reported by the parser
+    (read_fd, write_fd) = os.pipe()
+    parser = ScreenSaverSignalParser()
+    states = []
+    lines_are_read = threading.Semaphore(0)
+    def on_line(line):
+        is_locked = parser.feed(line)
+        if is_locked is not None:
+            states.append(is_locked)
+        lines_are_read.release()
+
+    listener = threading.Thread(target=listen_lines, args=(read_fd, on_line))
+    listener.start()
+    try:
+        for chunk in chunks:
+            os.write(write_fd, chunk.encode("utf-8"))
+            # the next chunk is written after the complete lines of this one are handled
+            for _ in range(chunk.count("\n")):
+                assert lines_are_read.acquire(timeout=5)
+    finally:
+        os.close(write_fd)
+        listener.join(5)
+        os.close(read_fd)
+    assert not listener.is_alive()
+    return states
+
+def test_lock_and_unlock_are_reported():
+    states = listen_chunks([get_active_changed_signal(True),
+                            "signal time=1619771124.0 sender=:1.30 -> destination=(null destination) path=/other; member=Other\n",
+                            "   boolean true\n",
+                            get_active_changed_signal(False)])
+    assert states == [True, False]
+
+def test_line_split_across_reads():
+    # the first chunk ends in the middle of the second ActiveChanged line, its complete lines are handled
+    # before the second chunk is written, so the split line is read by two reads
+    signal = get_active_changed_signal(True) + get_active_changed_signal(False)
+    split_index = signal.rindex("member=ActiveChanged") + len("member=Active")
+    states = listen_chunks([signal[:split_index], signal[split_index:]])
+    assert states == [True, False]
+
+def test_boolean_without_signal_is_ignored():
+    parser = ScreenSaverSignalParser()
+    assert parser.feed("   boolean true") is None
+    assert parser.feed(ACTIVE_CHANGED_LINE.rstrip("\n")) is None
+    assert parser.feed("   boolean false") is False
+    assert parser.feed("   boolean true") is None
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# Tests of the search of the logs of other machines for --merge-machines in __wingettotalresttime4.py,
+# run by: python -m pytest test_find_remote_files.py
+
+import os
+
+from __wingettotalresttime4 import find_remote_files, get_machine_name_of_remote_file
+
+def test_sidecars_and_temporary_files_are_not_remote_logs(tmp_path):
+    names = ["winlog_2021-04-30", "winlog_2021-04-30.tl", "winlog_2021-04-30.remote", "winlog_2021-04-30.remote.tl",
+             "winlog_2021-04-30.remote.laptop", "winlog_2021-04-30.remote.laptop.tl",
+             "winlog_2021-04-30.remote.laptop.tl.tmp"]
+    for name in names:
+        (tmp_path / name).write_text("")
+    remote_files = find_remote_files(os.path.join(str(tmp_path), "winlog_2021-04-30"))
+
+    assert [os.path.basename(x) for x in remote_files] == ["winlog_2021-04-30.remote", "winlog_2021-04-30.remote.laptop"]
+    assert [get_machine_name_of_remote_file(x) for x in remote_files] == ["remote", "laptop"]
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# Tests of the lock event files written by lock_state.py and read by __wingettotalresttime4.py --lock-events,
+# run by: python -m pytest test_lock_events.py
+
+import datetime
+import time
+
+import lock_state
+from __wingettotalresttime4 import read_lock_intervals
+
+def get_time(hour, minute):
+    return time.mktime((2021, 4, 30, hour, minute, 0, 0, 0, -1))
+
+def test_lock_and_unlock_are_paired(tmp_path):
+    lock_state.append_lock_event(str(tmp_path), lock_state.LOCKED, get_time(10, 0))
+    lock_state.append_lock_event(str(tmp_path), lock_state.UNLOCKED, get_time(10, 30))
+    lock_state.append_lock_event(str(tmp_path), lock_state.LOCKED, get_time(23, 0))
+
+    assert read_lock_intervals(str(tmp_path), "2021-04-30") == [
+            (datetime.datetime(2021, 4, 30, 10, 0), datetime.datetime(2021, 4, 30, 10, 30)),
+            (datetime.datetime(2021, 4, 30, 23, 0), None)]
+
+def test_start_of_daemon_closes_lock_interval(tmp_path):
+    # the daemon is restarted while the screen is locked, the unlock event is lost
+    lock_state.append_lock_event(str(tmp_path), lock_state.LOCKED, get_time(10, 0))
+    lock_state.append_lock_event(str(tmp_path), lock_state.UNKNOWN, get_time(10, 10))
+    lock_state.append_lock_event(str(tmp_path), lock_state.UNLOCKED, get_time(12, 0))
+
+    assert read_lock_intervals(str(tmp_path), "2021-04-30") == [
+            (datetime.datetime(2021, 4, 30, 10, 0), datetime.datetime(2021, 4, 30, 10, 10))]
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# Tests of the status word of the screen lock state in lock_state.py,
+# run by: python -m pytest test_lock_state.py
+
+import os
+
+import lock_state
+
+def test_published_state_is_read(tmp_path):
+    text_path = os.path.join(str(tmp_path), "IS_LOCKED")
+    publisher = lock_state.LockStatePublisher(text_path, should_append_events=False)
+    reader = lock_state.LockStateReader(text_path)
+    assert reader.read() == (lock_state.UNKNOWN, None)
+
+    publisher.publish(lock_state.LOCKED)
+    assert reader.is_locked()
+    publisher.publish(lock_state.UNLOCKED)
+    assert not reader.is_locked()
+    reader.close()
+    publisher.close()
+
+def test_odd_sequence_of_dead_publisher_is_unknown_state(tmp_path):
+    text_path = os.path.join(str(tmp_path), "IS_LOCKED")
+    publisher = lock_state.LockStatePublisher(text_path, should_append_events=False)
+    publisher.publish(lock_state.LOCKED)
+    # the publisher died between the two updates of the sequence counter
+    lock_state.SEQUENCE.pack_into(publisher.mm, 0, publisher.sequence + 1)
+    publisher.close()
+
+    reader = lock_state.LockStateReader(text_path)
+    assert reader.read() == (lock_state.UNKNOWN, None)
+    reader.close()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Tests of LogFileWriter and AsyncLogWriter (log_file_writer.py) driven by a fake sampler of windows,
+# run by: python -m pytest test_log_file_writer.py
+
+import os
+
+from log_file_writer import AsyncLogWriter, LogFileWriter
+
+class FakeDate:
+    # The date returned to the writers, it is changed by the test
+    def __init__(self, cur_date):
+        self.cur_date = cur_date
+
+    def __call__(self):
+        return self.cur_date
+
+def fake_sampler(num_lines, first_index=0):
+    # The lines in the format of TaskBarApp.WriteLog
+    for index in range(first_index, first_index + num_lines):
+        yield "2021-04-30_10-{:02d}-{:02d}\tWindow {}\t0.5 sec\n".format(index // 60 % 60, index % 60, index % 3)
+
+def read_log(folder, cur_date):
+    with open(os.path.join(folder, "winlog_" + cur_date), encoding="utf8") as f:
+        return f.read()
+
+class RecordingLogFileWriter(LogFileWriter):
+    # Records the calls of Write, i.e. the batches written by AsyncLogWriter
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.written_batches = []
+
+    def Write(self, log_line, cur_date=None):
+        self.written_batches.append((cur_date, log_line.count("\n")))
+        super().Write(log_line, cur_date)
+
+def test_lines_are_written_in_batches(tmp_path):
+    get_cur_date = FakeDate("2021-04-30")
+    log_file_writer = RecordingLogFileWriter(str(tmp_path), get_cur_date)
+    async_log_writer = AsyncLogWriter(log_file_writer, max_queue_size=100, max_batch_size=3)
+    lines = list(fake_sampler(7))
+    # the lines are queued before the thread starts, so the thread takes them in full batches
+    for line in lines:
+        async_log_writer.Write(line)
+    async_log_writer.Start()
+    async_log_writer.Stop()
+
+    assert log_file_writer.written_batches == [("2021-04-30", 3), ("2021-04-30", 3), ("2021-04-30", 1)]
+    assert read_log(str(tmp_path), "2021-04-30") == "".join(lines)
+    assert async_log_writer.num_write_errors == 0
+
+def test_log_file_is_rotated_by_dates(tmp_path):
+    get_cur_date = FakeDate("2021-04-30")
+    log_file_writer = LogFileWriter(str(tmp_path), get_cur_date)
+    async_log_writer = AsyncLogWriter(log_file_writer)
+    lines1 = list(fake_sampler(5))
+    lines2 = list(fake_sampler(4, first_index=5))
+    for line in lines1:
+        async_log_writer.Write(line)
+    get_cur_date.cur_date = "2021-05-01"
+    for line in lines2:
+        async_log_writer.Write(line)
+    async_log_writer.Start()
+    async_log_writer.Stop()
+
+    assert read_log(str(tmp_path), "2021-04-30") == "".join(lines1)
+    assert read_log(str(tmp_path), "2021-05-01") == "".join(lines2)
+
+def test_lines_are_dropped_when_queue_is_full(tmp_path):
+    log_file_writer = LogFileWriter(str(tmp_path), FakeDate("2021-04-30"))
+    async_log_writer = AsyncLogWriter(log_file_writer, max_queue_size=4)
+    lines = list(fake_sampler(10))
+    for line in lines:
+        async_log_writer.Write(line)
+
+    assert async_log_writer.num_dropped_lines == 6
+    assert async_log_writer.max_queue_depth == 4
+    async_log_writer.Start()
+    async_log_writer.Stop()
+    assert read_log(str(tmp_path), "2021-04-30") == "".join(lines[:4])
+
+def test_stop_drains_queue_and_closes_file(tmp_path):
+    log_file_writer = LogFileWriter(str(tmp_path), FakeDate("2021-04-30"))
+    async_log_writer = AsyncLogWriter(log_file_writer, max_batch_size=2)
+    async_log_writer.Start()
+    lines = list(fake_sampler(50))
+    for line in lines:
+        async_log_writer.Write(line)
+    async_log_writer.Stop()
+
+    assert not async_log_writer.thread.is_alive()
+    assert async_log_writer.QueueDepth() == 0
+    assert log_file_writer.f is None
+    assert read_log(str(tmp_path), "2021-04-30") == "".join(lines)
+
+def test_moved_log_file_is_reopened_after_fsync_interval(tmp_path):
+    log_file_writer = LogFileWriter(str(tmp_path), FakeDate("2021-04-30"), fsync_interval=3600)
+    lines = list(fake_sampler(3))
+    log_file_writer.Write(lines[0])
+    os.rename(os.path.join(str(tmp_path), "winlog_2021-04-30"), os.path.join(str(tmp_path), "moved"))
+    # the move is not checked before the fsync interval passes
+    log_file_writer.Write(lines[1])
+    log_file_writer.time_of_last_move_check -= 3600
+    log_file_writer.Write(lines[2])
+    log_file_writer.Close()
+
+    assert read_log(str(tmp_path), "2021-04-30") == lines[2]
+    with open(os.path.join(str(tmp_path), "moved"), encoding="utf8") as f:
+        assert f.read() == lines[0] + lines[1]
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# Tests of the --follow mode (LogFollower and main_for_follow) of __wingettotalresttime4.py,
+# run by: python -m pytest test_log_follower.py
+
+import os
+
+import __wingettotalresttime4
+from __wingettotalresttime4 import LogFileHandling, LogFollower, main_for_follow
+
+def make_log_lines(cur_date, num_lines):
+    return "".join("{}_10-{:02d}-{:02d}\tP\tWindow\t0.5 sec\n".format(cur_date, index * 15 // 60, index * 15 % 60)
+                   for index in range(num_lines))
+
+def test_missing_log_has_no_new_lines(tmp_path):
+    file_path = os.path.join(str(tmp_path), "winlog_2021-04-30")
+    log_follower = LogFollower(file_path)
+    log_follower.update()
+    assert log_follower.time_info["num_work_items"] == 0
+
+    with open(file_path, "w") as f:
+        f.write(make_log_lines("2021-04-30", 5))
+    log_follower.update()
+    assert log_follower.time_info["num_work_items"] > 0
+
+def test_current_log_is_changed_with_date(tmp_path, monkeypatch, capsys):
+    folder = str(tmp_path)
+    with open(os.path.join(folder, "winlog_2021-05-01"), "w") as f:
+        f.write(make_log_lines("2021-05-01", 5))
+    # the current date of each update, the log of the first date is not written yet
+    cur_dates = ["2021-04-30", "2021-04-30", "2021-05-01"]
+    monkeypatch.setattr(LogFileHandling, "current_worklog_path",
+                        staticmethod(lambda date_suffix: os.path.join(folder, "winlog_" + cur_dates.pop(0))))
+    def sleep(seconds):
+        # stops following after the last date
+        if not cur_dates:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(__wingettotalresttime4.time, "sleep", sleep)
+    main_for_follow(None, 0)
+
+    out_lines = capsys.readouterr().out.splitlines()
+    assert [x.split(",")[0] for x in out_lines if x.startswith("Following")] == [
+            "Following " + os.path.join(folder, "winlog_2021-04-30"), "Following " + os.path.join(folder, "winlog_2021-05-01")]
+    assert "total work = 0:00" in out_lines[1]
+    assert "total work = 0:00" not in out_lines[-1]
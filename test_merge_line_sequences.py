@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# Tests of the k-way merge of the overlapping input files in __wingettotalresttime4.py,
+# run by: python -m pytest test_merge_line_sequences.py
+
+from __wingettotalresttime4 import merge_line_sequences
+
+def test_blocks_of_same_second_from_one_file_are_kept():
+    # several lines in a second are usual in the event log mode
+    line_sequence1 = ["2021-04-30_10-00-00", "active 300", "2021-04-30_10-00-00", "rest 5 min", "2021-04-30_10-00-15"]
+    line_sequence2 = ["2021-04-30_10-00-10", "active 300"]
+    assert list(merge_line_sequences([line_sequence1, line_sequence2])) == [
+            "2021-04-30_10-00-00", "active 300", "2021-04-30_10-00-00", "rest 5 min",
+            "2021-04-30_10-00-10", "active 300",
+            "2021-04-30_10-00-15"]
+
+def test_same_blocks_from_other_files_are_dropped():
+    line_sequence1 = ["2021-04-30_10-00-00", "2021-04-30_10-00-00", "rest", "2021-04-30_10-00-15"]
+    line_sequence2 = ["2021-04-30_10-00-00", "rest", "2021-04-30_10-00-15", "2021-04-30_10-00-30"]
+    assert list(merge_line_sequences([line_sequence1, line_sequence2])) == [
+            "2021-04-30_10-00-00", "2021-04-30_10-00-00", "rest", "2021-04-30_10-00-15", "2021-04-30_10-00-30"]
+
+def test_different_blocks_of_same_timestamp_from_other_files_are_kept():
+    line_sequence1 = ["2021-04-30_10-00-00", "2021-04-30_10-00-15"]
+    line_sequence2 = ["2021-04-30_10-00-00", "rest 1 min", "2021-04-30_10-00-15"]
+    assert list(merge_line_sequences([line_sequence1, line_sequence2])) == [
+            "2021-04-30_10-00-00", "2021-04-30_10-00-00", "rest 1 min", "2021-04-30_10-00-15"]
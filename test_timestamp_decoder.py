@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+# Test of TimestampDecoder against datetime.strptime (see check_timestamp_decoder.py),
+# run by: python -m pytest test_timestamp_decoder.py
+
+from check_timestamp_decoder import check_decoder, generate_timestamps
+
+def test_decoder_gives_same_results_as_strptime():
+    assert check_decoder(generate_timestamps(10000, seed=0)) == 0
@@ -8,34 +8,49 @@ from time import strftime, localtime, time, sleep
 from ctypes import windll, Structure, c_uint, sizeof, byref
 import os #, time
 #from datetime import datetime
-import psutil
 import sys
+from instance_lock import InstanceLock
+from log_file_writer import LogFileWriter, AsyncLogWriter
 
 # This var is used for a rude hack with global vars, sorry
 USERNAME=os.environ["USERNAME"]
+# In the event log mode a line is written only when the window or the activity changes, and every HEARTBEAT seconds
+IS_EVENT_LOG=("--event-log" in sys.argv)
+
+# The lock is held while the logger works, it is released by the OS when the process exits
+INSTANCE_LOCK = InstanceLock(f"C:/cygwin64/home/{USERNAME}/worklog/windows_logger3.lock")
 
 def is_daemon_run():
-    procs = [p for p in psutil.process_iter() if 'python' in p.name()]
-    procs = [p for p in procs if p.pid != os.getpid()]
-    cur_file_name = os.path.basename(__file__)
-    for p in procs:
-        cmdline = p.cmdline()
-        if len(cmdline) > 1 and os.path.basename(cmdline[1]) == cur_file_name:
-            print(f'Found existing daemon process pid={p.pid}')
-            return True
-    return False
+    if INSTANCE_LOCK.acquire():
+        return False
+    print(f'Found existing daemon process pid={INSTANCE_LOCK.get_owner_pid()}')
+    return True
 
 
 class TaskBarApp(wx.Frame):
-    def __init__(self, parent, id, title, username="lbeynens"):
+    def __init__(self, parent, id, title, username="lbeynens", is_event_log=False):
         wx.Frame.__init__(self, parent, -1, title, size = (1, 1), style=wx.FRAME_NO_TASKBAR|wx.NO_FULL_REPAINT_ON_RESIZE)
 
         self.TIMESTEP = 10000 #ms
         self.WAS_ACTIVE = True
         self.TIME_OF_SCREENSAVER_START = 0
 
+        self.IS_EVENT_LOG = is_event_log
+        self.HEARTBEAT = 300 #sec
+        # the time after a line during which the next line is expected while the user is active,
+        # __wingettotalresttime4.py counts such time as work
+        self.ACTIVE_TIMEOUT = self.HEARTBEAT + 2 * self.TIMESTEP // 1000 #sec
+        self.last_logged_window_text = None
+        self.time_of_last_logged_line = 0
+        self.time_of_last_active_step = 0
+        self.last_active_window_text = ""
+
         self.LOG_FILE_FOLDER = f"C:/cygwin64/home/{username}/worklog/"
-        self.LOG_FILE_PATH = os.path.join(self.LOG_FILE_FOLDER, "winlog_" + self.CurDate())
+        self.LOG_FSYNC_INTERVAL = 60 #sec
+        self.LOG_WRITER_QUEUE_SIZE = 1000
+        self.log_file_writer = LogFileWriter(self.LOG_FILE_FOLDER, self.CurDate, self.LOG_FSYNC_INTERVAL)
+        self.async_log_writer = AsyncLogWriter(self.log_file_writer, self.LOG_WRITER_QUEUE_SIZE)
+        self.LOG_FILE_PATH = self.log_file_writer.GetPath()
 
         self.ICONS_FOLDER = f"C:/cygwin64/home/{username}/bin/"
         self.LOGON_ICON_PATH = os.path.join(self.ICONS_FOLDER, 'logon.ico')
@@ -60,9 +75,11 @@ class TaskBarApp(wx.Frame):
         if self.DoesLogFileExist():
             print(f"Log file {self.LOG_FILE_PATH} exists, add rest line")
             self.Write("\nrest ????????\n\n")
+        self.async_log_writer.Start()
         self.WriteLog("__LOGGERSTART__", 0)
 
     def OnTaskBarLeftDClick(self, evt):
+        self.last_logged_window_text = None
         if self.ICON_STATE == 0:
             self.WriteLog("__LOGGERUNPAUSE__", 0)
             self.StartIconTimer()
@@ -72,6 +89,8 @@ class TaskBarApp(wx.Frame):
         else:
             self.StopIconTimer()
             self.WriteLog("__LOGGERPAUSE__", 0)
+            self.async_log_writer.Sync()
+            print("Log writer:", self.async_log_writer.GetStats())
             icon = wx.Icon(self.LOGOFF_ICON_PATH, wx.BITMAP_TYPE_ICO)
             self.tbicon.SetIcon(icon, 'Not Logging')
             self.ICON_STATE = 0
@@ -79,6 +98,8 @@ class TaskBarApp(wx.Frame):
     def OnTaskBarRightClick(self, evt):
         self.StopIconTimer()
         self.WriteLog( "__LOGGERSTOP__", 0)
+        self.async_log_writer.Stop()
+        print("Log writer:", self.async_log_writer.GetStats())
         self.tbicon.Destroy()
         self.Close(True)
         wx.GetApp().ProcessIdle()
@@ -117,12 +138,25 @@ class TaskBarApp(wx.Frame):
 #                    else: #very small rest
 #                        self.Write("\n") #is it required?
 
-                self.WriteLog(window_text, str(idleDelta) )
+                if not self.IS_EVENT_LOG:
+                    self.WriteLog(window_text, str(idleDelta) )
+                elif (not self.WAS_ACTIVE) or (window_text != self.last_logged_window_text) \
+                        or (time() - self.time_of_last_logged_line >= self.HEARTBEAT):
+                    self.WriteLog(window_text, str(idleDelta) )
+                    self.Write("active {}\n".format(self.ACTIVE_TIMEOUT))
+                    self.last_logged_window_text = window_text
+                    self.time_of_last_logged_line = time()
                 self.TIME_OF_SCREENSAVER_START = 0
+                self.time_of_last_active_step = time()
+                self.last_active_window_text = window_text
 
             else: #is_active == False
                 if self.WAS_ACTIVE:
                     self.TIME_OF_SCREENSAVER_START = time()
+                    if self.IS_EVENT_LOG and self.time_of_last_active_step:
+                        # the end of the activity is the last active step, the line is written without "active"
+                        self.WriteLog(self.last_active_window_text, 0, self.time_of_last_active_step)
+                        self.last_logged_window_text = None
 
             self.WAS_ACTIVE = is_active
         except Exception:
@@ -131,20 +165,18 @@ class TaskBarApp(wx.Frame):
             #with open(err_file, 'a') as f:
             traceback.print_exc(None, None);
 
-    def WriteLog(self, text, idle_time):
-        log_line = '%s\t%s\t%-100s\t%f sec\n' % (self.Now(), self.COMPUTER_PREFIX, text, float(idle_time))
+    def WriteLog(self, text, idle_time, cur_time=None):
+        log_line = '%s\t%s\t%-100s\t%f sec\n' % (self.Now(cur_time), self.COMPUTER_PREFIX, text, float(idle_time))
         self.Write(log_line)
 
     def DoesLogFileExist(self):
-        return os.path.isfile(self.LOG_FILE_PATH)
+        return self.log_file_writer.DoesLogFileExist()
 
     def Write(self, log_line):
-        f=open(self.LOG_FILE_PATH, 'a', encoding="utf8", errors='ignore')
-        f.write (log_line)
-        f.close()
+        self.async_log_writer.Write(log_line)
 
-    def Now(self):
-        return strftime("%Y-%m-%d_%H-%M-%S", localtime())
+    def Now(self, cur_time=None):
+        return strftime("%Y-%m-%d_%H-%M-%S", localtime(cur_time))
 
     def CurDate(self):
         timestamp_str = self.Now()
@@ -159,7 +191,7 @@ class MyApp(wx.App):
     def OnInit(self):
         self.username=USERNAME
         print(f"self.username={self.username}")
-        frame = TaskBarApp(None, -1, ' ', self.username)
+        frame = TaskBarApp(None, -1, ' ', self.username, IS_EVENT_LOG)
         frame.Center(wx.BOTH)
         frame.Show(False)
         return True
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# The subcommands of __wingettotalresttime4.py that replace the shell scripts:
+# * sumrest -- the same output as winsumrest2: the lines with the word "rest", the strange ones among them,
+#   the running sums of "rest N min" and the result
+# * quick -- the output in the format of wingettotalresttime: the total time between the first and the last timestamps
+#   without the summed rest and the input rest time, and the remaining time to the target of 6 hours.
+#   Unlike wingettotalresttime, FIRST_TIME and LAST_TIME are taken from the first and the last lines with a timestamp,
+#   not from the first and the last non-blank lines, so a trailing line without timestamp (e.g. "rest 10 min")
+#   does not break the result; for the logs that begin and end with timestamps the output is the same.
+#
+# Only the standard modules are imported here, since __wingettotalresttime4.py runs the subcommands
+# before importing its heavy modules.
+
+import argparse
+import os
+import re
+import sys
+
+DEFAULT_FOLDER_WITH_LOGS = "/home/lbeynens//worklog/"
+
+worklog_name_re = re.compile(r'^winlog_20[0-9][0-9]-[0-9][0-9]-[0-9][0-9]$')
+# grep "\<rest\>"
+rest_word_re = re.compile(r'(?<!\w)rest(?!\w)')
+# grep "^ *rest \+\([0-9]\+\) \+min"
+rest_min_line_re = re.compile(r'^ *rest +[0-9]+ +min')
+# sed -e "s/^.*rest \+\([0-9]\+\) \+min.*$/\1/" -- the last "rest N min" of the line
+rest_min_value_re = re.compile(r'^.*rest +([0-9]+) +min')
+# sed -e "s/^[^_]*_\([0-9]\+\)-\([0-9]\+\)-\([0-9]\+\)[^0-9-].*/\1 \2 \3/"
+time_in_line_re = re.compile(r'^[^_]*_([0-9]+)-([0-9]+)-([0-9]+)(?:[^0-9-]|$)')
+
+# wingettotalresttime uses 6 hours, the same as DEFAULT_TARGET_TIME_IN_HOURS() in __wingettotalresttime4.py
+DEFAULT_TARGET_TIME_IN_MINUTES = 6 * 60
+
+def get_current_worklog_path(folder=DEFAULT_FOLDER_WITH_LOGS):
+    # The same as winnamelog: the last log in the folder
+    names = sorted(x for x in os.listdir(folder) if worklog_name_re.match(x))
+    if not names:
+        return None
+    return os.path.join(folder, names[-1])
+
+def iterate_lines(file_path):
+    # The lines are kept as they are, the bytes that are not utf8 are written back without changes
+    with open(file_path, encoding="utf8", errors="surrogateescape", newline="") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+def calculate_sum_rest(lines):
+    # Returns the lines with the word "rest", the strange lines among them (without "rest N min" at the beginning),
+    # and the running sums of the minutes in the other lines
+    all_lines = []
+    strange_lines = []
+    sums = []
+    sum_rest = 0
+    for line in lines:
+        if not rest_word_re.search(line):
+            continue
+        all_lines.append(line)
+        if not rest_min_line_re.match(line):
+            strange_lines.append(line)
+            continue
+        sum_rest += int(rest_min_value_re.match(line).group(1))
+        sums.append(sum_rest)
+    return (all_lines, strange_lines, sums)
+
+def get_worklog_path_from_args(args):
+    file_path = args.file or get_current_worklog_path()
+    if not file_path:
+        print("No log is found", file=sys.stderr)
+        return None
+    return file_path
+
+def main_for_sumrest(argv):
+    parser = argparse.ArgumentParser(prog="__wingettotalresttime4.py sumrest",
+                                     description="Sum 'rest N min' lines of the log, the same as winsumrest2")
+    parser.add_argument("file", nargs="?", help="The log, by default the last log in the folder with logs")
+    args = parser.parse_args(argv)
+    file_path = get_worklog_path_from_args(args)
+    if not file_path:
+        return 1
+
+    (all_lines, strange_lines, sums) = calculate_sum_rest(iterate_lines(file_path))
+    out = ["ALL LINES:"] + all_lines + [""]
+    out += ["STRANGE LINES:"] + strange_lines + [""]
+    out += ["SUMMING LINES:"] + [str(x) for x in sums] + [""]
+    out += ["RESULT", "{} min".format(sums[-1] if sums else "")]
+    sys.stdout.buffer.write(("\n".join(out) + "\n").encode("utf8", errors="surrogateescape"))
+    return 0
+
+def div_toward_zero(a, b):
+    # The integer division of bash
+    return a // b if a * b >= 0 else -(-a // b)
+
+def to_hours_and_minutes(minutes):
+    hours = div_toward_zero(minutes, 60)
+    return (hours, minutes - hours * 60)
+
+def parse_number(text):
+    # sed -e "s/^[ 0]*//" and $(( ... )): the empty value is 0
+    text = text.lstrip(" 0")
+    return int(text) if text else 0
+
+def parse_input_rest_time(input_rest_time):
+    # The input rest time is e.g. "1h 30m" or "1:30": the first number is hours, the second one is minutes.
+    # The same as "cut -d ' ' -f 1" and "-f 2" in wingettotalresttime: if there is one number only,
+    # cut returns the whole line for both fields, so "45" is 45 h 45 min
+    text = re.sub(r' +', ' ', re.sub(r'[^0-9]', ' ', input_rest_time).lstrip(" "))
+    fields = text.split(" ")
+    if len(fields) == 1:
+        fields = fields * 2
+    return (parse_number(fields[0]), parse_number(fields[1]))
+
+def calculate_quick(file_path):
+    # One pass over the log: the first and the last timestamps (as strings "HH", "MM", "SS") and the summed rest;
+    # the lines without timestamps are skipped for the first and the last timestamps, see the comment at the beginning
+    times = []
+    def iterate_lines_detecting_times():
+        for line in iterate_lines(file_path):
+            m = time_in_line_re.match(line)
+            if m:
+                if not times:
+                    times.append(m.groups())
+                times[1:] = [m.groups()]
+            yield line
+    (_, _, sums) = calculate_sum_rest(iterate_lines_detecting_times())
+    if not times:
+        return None
+    return (times[0], times[-1], sums[-1] if sums else 0)
+
+def main_for_quick(argv):
+    parser = argparse.ArgumentParser(prog="__wingettotalresttime4.py quick",
+                                     description="Calculate the remaining time quickly in the format of wingettotalresttime; "
+                                                 "FIRST_TIME and LAST_TIME are from the first and the last lines with a timestamp "
+                                                 "(wingettotalresttime used the first and the last non-blank lines)")
+    parser.add_argument("input_rest_time", nargs="?", default="",
+                        help="The rest time that is not in the log, e.g. '1h 30m' (the first number is hours, the second is minutes)")
+    parser.add_argument("--file", help="The log, by default the last log in the folder with logs")
+    args = parser.parse_args(argv)
+    file_path = get_worklog_path_from_args(args)
+    if not file_path:
+        return 1
+
+    result = calculate_quick(file_path)
+    if not result:
+        print("No timestamps in", file_path, file=sys.stderr)
+        return 1
+    (first_time, last_time, sum_rest) = result
+    (first_time_h, first_time_m) = (parse_number(first_time[0]), parse_number(first_time[1]))
+    (last_time_h, last_time_m) = (parse_number(last_time[0]), parse_number(last_time[1]))
+    # the sign is removed by sed in wingettotalresttime
+    total_time = abs(last_time_h * 60 + last_time_m - first_time_h * 60 - first_time_m)
+    (input_rest_time_h, input_rest_time_m) = parse_input_rest_time(args.input_rest_time)
+    total_time_no_rest = total_time - sum_rest
+    total_time_no_rest_and_no_input_time_rest = total_time_no_rest - input_rest_time_h * 60 - input_rest_time_m
+    result_total = DEFAULT_TARGET_TIME_IN_MINUTES - total_time_no_rest_and_no_input_time_rest
+    (result_h, result_m) = to_hours_and_minutes(result_total)
+
+    out = ["FIRST_TIME = {}".format(" ".join(first_time)),
+           "LAST_TIME = {}".format(" ".join(last_time)),
+           "FIRST_TIME_H = '{}'".format(first_time_h),
+           "FIRST_TIME_M = '{}'".format(first_time_m),
+           "LAST_TIME_H = '{}'".format(last_time_h),
+           "LAST_TIME_M = '{}'".format(last_time_m),
+           "TOTAL_TIME_M = '{}'".format(total_time),
+           "TOTAL_TIME = {} h {} min".format(*to_hours_and_minutes(total_time)),
+           "",
+           "WINSUMREST = '{}'".format(sum_rest),
+           "WINSUMREST = {} h {} min".format(*to_hours_and_minutes(sum_rest)),
+           "INPUT-REST-TIME = {} h {} min".format(input_rest_time_h, input_rest_time_m),
+           "TOTAL_TIME_NO_REST = '{}'".format(total_time_no_rest),
+           "TOTAL_TIME_NO_REST_AND_NO_INPUT_TIME_REST = {}".format(total_time_no_rest_and_no_input_time_rest),
+           "TOTAL_TIME_NO_REST_AND_NO_INPUT_TIME_REST = {} h {} min".format(
+               *to_hours_and_minutes(total_time_no_rest_and_no_input_time_rest)),
+           "RESULT_TOTAL = {}".format(result_total),
+           "",
+           "RESULT {} h {} min".format(result_h, result_m),
+           "RESULT_IN_HOURS = {:.2f}".format(result_h + result_m / 60)]
+    print("\n".join(out))
+    return 0
+
+SUBCOMMANDS = {"sumrest": main_for_sumrest,
+               "quick": main_for_quick}
+
+def main(argv):
+    # argv[0] is the name of the subcommand
+    return SUBCOMMANDS[argv[0]](argv[1:])